@@ -0,0 +1,175 @@
+import numpy as np
+from mechanisms import build_payoff_arrays, solve_2x2_arrays
+
+# learning rules supported by run_learning
+# - fictitious_play: each player best responds to the empirical frequency of the other's past actions
+# - replicator:      discrete replicator dynamics (logit form, step size stepSize)
+# - regret_matching: each player samples actions in proportion to its positive cumulative regrets
+LEARNING_RULES = ["fictitious_play", "replicator", "regret_matching"]
+
+# one record per trajectory per recorded round: the current strategies (x, y),
+# their running averages and the distance of the averages to the equilibrium
+TRAJECTORY_DTYPE = [
+    ("x", "f4"),
+    ("y", "f4"),
+    ("avg_x", "f4"),
+    ("avg_y", "f4"),
+    ("distance", "f4"),
+]
+
+# one record per trajectory returned by run_learning. converged_round is the
+# round after which the averaged strategies stayed within tol of (x*, y*),
+# or -1 if they had not settled by the last round
+SUMMARY_DTYPE = [
+    ("p", "f8"),
+    ("run", "i4"),
+    ("x_star", "f8"),
+    ("y_star", "f8"),
+    ("kind", "i1"),
+    ("avg_x", "f8"),
+    ("avg_y", "f8"),
+    ("distance", "f8"),
+    ("converged_round", "i8"),
+]
+
+# payoff of each pure action against the opponent's mixed strategy, shape (T, 2):
+# DC's [P, T] against ADV playing E with prob y, ADV's [E, T] against DC playing P with prob x
+def _action_payoffs(dcMatrix, advMatrix, x, y):
+    dcPayoffs = dcMatrix[:, :, 0] * y[:, None] + dcMatrix[:, :, 1] * (1.0 - y[:, None])
+    advPayoffs = advMatrix[:, 0, :] * x[:, None] + advMatrix[:, 1, :] * (1.0 - x[:, None])
+    return dcPayoffs, advPayoffs
+
+# mixed strategy (prob of the first action) proportional to the positive regrets,
+# uniform when no action has positive regret
+def _regret_strategy(regrets):
+    positive = np.maximum(regrets, 0.0)
+    total = positive.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total > 0.0, positive[:, 0] / total, 0.5)
+
+# the three rules as (init, step) pairs. init draws the starting state of every
+# trajectory, step returns the strategies (x, y) played this round and updates the state
+
+def _fictitious_play_init(numTrajectories, rng):
+    # random prior beliefs, worth one round of observations
+    return {"beliefX": rng.random(numTrajectories), "beliefY": rng.random(numTrajectories), "n": 1}
+
+def _fictitious_play_step(state, dcMatrix, advMatrix, rng, stepSize):
+    dcPayoffs, advPayoffs = _action_payoffs(dcMatrix, advMatrix, state["beliefX"], state["beliefY"])
+    x = (dcPayoffs[:, 0] >= dcPayoffs[:, 1]).astype(float)
+    y = (advPayoffs[:, 0] >= advPayoffs[:, 1]).astype(float)
+
+    n = state["n"] + 1
+    state["beliefX"] += (x - state["beliefX"]) / n
+    state["beliefY"] += (y - state["beliefY"]) / n
+    state["n"] = n
+    return x, y
+
+def _replicator_init(numTrajectories, rng):
+    # random interior starting point, kept as log-odds so it never leaves (0, 1)
+    start = rng.uniform(0.05, 0.95, size=(2, numTrajectories))
+    return {"logitX": np.log(start[0] / (1.0 - start[0])), "logitY": np.log(start[1] / (1.0 - start[1]))}
+
+def _replicator_step(state, dcMatrix, advMatrix, rng, stepSize):
+    x = 1.0 / (1.0 + np.exp(-state["logitX"]))
+    y = 1.0 / (1.0 + np.exp(-state["logitY"]))
+
+    # x' = x (1 - x) (u_P - u_T) is d logit(x) / dt = u_P - u_T
+    dcPayoffs, advPayoffs = _action_payoffs(dcMatrix, advMatrix, x, y)
+    state["logitX"] += stepSize * (dcPayoffs[:, 0] - dcPayoffs[:, 1])
+    state["logitY"] += stepSize * (advPayoffs[:, 0] - advPayoffs[:, 1])
+    return x, y
+
+def _regret_matching_init(numTrajectories, rng):
+    return {"dcRegrets": np.zeros((numTrajectories, 2)), "advRegrets": np.zeros((numTrajectories, 2))}
+
+def _regret_matching_step(state, dcMatrix, advMatrix, rng, stepSize):
+    x = _regret_strategy(state["dcRegrets"])
+    y = _regret_strategy(state["advRegrets"])
+    protect = rng.random(len(x)) < x
+    exploit = rng.random(len(y)) < y
+
+    # payoff of every action against what the other player actually did
+    dcPayoffs = np.where(exploit[:, None], dcMatrix[:, :, 0], dcMatrix[:, :, 1])
+    advPayoffs = np.where(protect[:, None], advMatrix[:, 0, :], advMatrix[:, 1, :])
+    dcPlayed = np.where(protect, dcPayoffs[:, 0], dcPayoffs[:, 1])
+    advPlayed = np.where(exploit, advPayoffs[:, 0], advPayoffs[:, 1])
+
+    state["dcRegrets"] += dcPayoffs - dcPlayed[:, None]
+    state["advRegrets"] += advPayoffs - advPlayed[:, None]
+    return x, y
+
+_RULES = {
+    "fictitious_play": (_fictitious_play_init, _fictitious_play_step),
+    "replicator": (_replicator_init, _replicator_step),
+    "regret_matching": (_regret_matching_init, _regret_matching_step),
+}
+
+# plays `runs` independent learning trajectories for every p in pValues at once
+# (p varies slowest, trajectory i is p index i // runs, run i % runs), all held in
+# numpy arrays and advanced together one round per step. the running averages of
+# the strategies are what converge to the NE (the current ones may cycle around
+# it), so distance and convergence are measured on them.
+#
+# the state of all trajectories is stored every stride rounds, where stride is
+# recordEvery raised to ceil(rounds / maxRecords) when needed, so the trajectory
+# array never has more than maxRecords rows however many rounds are played
+# (row i is round (i + 1) * stride). with trajectoryFile set the rows are written
+# straight to that .npy file (a memory map) instead of being kept in memory.
+#
+# returns (summary, trajectories): a SUMMARY_DTYPE record per trajectory and a
+# (rounds // stride, len(pValues) * runs) array of TRAJECTORY_DTYPE records
+def run_learning(pValues, params, rule="fictitious_play", runs=100, rounds=10_000, seed=None,
+                 recordEvery=100, maxRecords=1000, tol=1e-2, stepSize=0.01, trajectoryFile=None):
+    if rule not in _RULES:
+        raise ValueError(f"Unknown learning rule '{rule}'")
+    init, step = _RULES[rule]
+
+    p = np.repeat(np.asarray(pValues, dtype=float), runs)
+    numTrajectories = len(p)
+    dcMatrix, advMatrix = build_payoff_arrays(p, params)
+    solution = solve_2x2_arrays(dcMatrix, advMatrix)
+    xStar, yStar = solution["x_star"], solution["y_star"]
+
+    stride = max(recordEvery, -(-rounds // maxRecords))
+    numRecords = rounds // stride
+    if trajectoryFile is None:
+        trajectories = np.empty((numRecords, numTrajectories), dtype=TRAJECTORY_DTYPE)
+    else:
+        trajectories = np.lib.format.open_memmap(trajectoryFile, mode="w+", dtype=TRAJECTORY_DTYPE,
+                                                 shape=(numRecords, numTrajectories))
+
+    rng = np.random.default_rng(seed)
+    state = init(numTrajectories, rng)
+    sumX = np.zeros(numTrajectories)
+    sumY = np.zeros(numTrajectories)
+    lastOutside = np.full(numTrajectories, -1, dtype=np.int64)
+    for t in range(rounds):
+        x, y = step(state, dcMatrix, advMatrix, rng, stepSize)
+        sumX += x
+        sumY += y
+        avgX, avgY = sumX / (t + 1), sumY / (t + 1)
+        distance = np.hypot(avgX - xStar, avgY - yStar)
+        lastOutside[distance > tol] = t
+
+        if (t + 1) % stride == 0:
+            row = trajectories[t // stride]
+            row["x"], row["y"] = x, y
+            row["avg_x"], row["avg_y"] = avgX, avgY
+            row["distance"] = distance
+
+    if trajectoryFile is not None:
+        trajectories.flush()
+
+    summary = np.empty(numTrajectories, dtype=SUMMARY_DTYPE)
+    summary["p"] = p
+    summary["run"] = np.tile(np.arange(runs), len(pValues))
+    summary["x_star"], summary["y_star"] = xStar, yStar
+    summary["kind"] = solution["kind"]
+    if rounds > 0:
+        summary["avg_x"], summary["avg_y"] = avgX, avgY
+        summary["distance"] = distance
+    else:
+        summary["avg_x"] = summary["avg_y"] = summary["distance"] = np.nan
+    summary["converged_round"] = np.where(lastOutside < rounds - 1, lastOutside + 1, -1)
+    return summary, trajectories
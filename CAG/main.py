@@ -1,5 +1,6 @@
 from params import default_params
 from simulate import run_p_sweep
+from optimize import optimal_p
 
 
 def main():
@@ -19,5 +20,13 @@ def main():
             f"| DC={stats['dc_payoff']:.3f} | ADV={stats['adv_payoff']:.3f}"
         )
 
+    # search p continuously instead of only the values above
+    pMin, pMax = 0.0, 20.0
+    print(f"\nBest p for the data collector in [{pMin:g}, {pMax:g}]:")
+    bestP, stats = optimal_p(params, pMin, pMax, objective="dc_payoff")
+    print(f"  max DC payoff: p={bestP:.3f} | DC={stats['dc_payoff']:.3f} ({stats['kind']} NE)")
+    bestP, stats = optimal_p(params, pMin, pMax, objective="leakage_prob")
+    print(f"  min leakage:   p={bestP:.3f} | leak={stats['leakage_prob']:.3f} ({stats['kind']} NE)")
+
 if __name__ == "__main__":
     main()
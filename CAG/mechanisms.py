@@ -1,5 +1,7 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Dict
+import numpy as np
 from params import GameParams
 from players import DCStrategy, ADVStrategy
 
@@ -121,3 +123,172 @@ def equilibrium_metrics_from_mixed(p, params, dcMatrix, advMatrix, xStar, yStar)
         "dc_payoff": dcPayoff,
         "adv_payoff": advPayoff,
     }
+
+
+# array versions of the functions above, used for grid sweeps. p and any
+# GameParams field may be numpy arrays; they broadcast together and every
+# payoff matrix becomes an array of shape (..., 2, 2) with [..., row, col]
+# using the same (P/T, E/T) convention as above
+
+# stacks four broadcastable arrays into (..., 2, 2) matrices [[a, b], [c, d]]
+def _stack2x2(a, b, c, d):
+    a, b, c, d = np.broadcast_arrays(a, b, c, d)
+    return np.stack([a, b, c, d], axis=-1).reshape(a.shape + (2, 2))
+
+# build the payoff matrices for every grid point at once
+def build_payoff_arrays(p, params):
+    probProtectSuccess = params.successProbProtected(p)
+    dcBenefitP = params.dcPrivacyBenefitProtected(p)
+    dcCostP = params.dcCostProtected(p)
+
+    dcPE = dcBenefitP - dcCostP - params.dcLossOnBreach * probProtectSuccess
+    advPE = params.advValueSuccess * probProtectSuccess - params.advAttackCost
+    dcPT = dcBenefitP - dcCostP
+    dcTE = (params.dcPrivacyBenefitTransparent - params.dcCostTransparent - params.dcLossOnBreach * params.successProbTransparent)
+    advTE = (params.advValueSuccess * params.successProbTransparent - params.advAttackCost)
+    dcTT = params.dcPrivacyBenefitTransparent - params.dcCostTransparent
+
+    zero = np.zeros_like(advPE, dtype=float)
+    dcMatrix = _stack2x2(dcPE, dcPT, dcTE, dcTT)
+    advMatrix = _stack2x2(advPE, zero, advTE, zero)
+    return dcMatrix, advMatrix
+
+# interior mixed NE for every grid point. instead of raising, points without
+# an interior mixed NE get NaN for x* and y*
+def compute_mixed_equilibrium_arrays(dcMatrix, advMatrix):
+    a, b, c, d = dcMatrix[..., 0, 0], dcMatrix[..., 0, 1], dcMatrix[..., 1, 0], dcMatrix[..., 1, 1]
+    e, f, g, h = advMatrix[..., 0, 0], advMatrix[..., 0, 1], advMatrix[..., 1, 0], advMatrix[..., 1, 1]
+
+    denomAdv = (e - g) - (f - h)
+    denomDc = (a - c) - (b - d)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        xStar = (h - g) / denomAdv
+        yStar = (d - b) / denomDc
+
+    valid = ((np.abs(denomAdv) >= 1e-12) & (np.abs(denomDc) >= 1e-12)
+             & (xStar >= 0.0) & (xStar <= 1.0) & (yStar >= 0.0) & (yStar <= 1.0))
+    return np.where(valid, xStar, np.nan), np.where(valid, yStar, np.nan)
+
+# leakage and expected payoffs for every grid point, same dict keys as
+# equilibrium_metrics_from_mixed but with array values
+def equilibrium_metrics_arrays(p, params, dcMatrix, advMatrix, xStar, yStar):
+    x = xStar
+    y = yStar
+
+    qP = params.successProbProtected(p)
+    qEff = x * qP + (1.0 - x) * params.successProbTransparent
+    leakageProb = y * qEff
+
+    # probability of each action profile, shape (..., 2, 2)
+    probs = _stack2x2(x * y, x * (1.0 - y), (1.0 - x) * y, (1.0 - x) * (1.0 - y))
+    dcPayoff = (probs * dcMatrix).sum(axis=(-2, -1))
+    advPayoff = (probs * advMatrix).sum(axis=(-2, -1))
+
+    return {
+        "p": p,
+        "x_star": x,
+        "y_star": y,
+        "leakage_prob": leakageProb,
+        "dc_payoff": dcPayoff,
+        "adv_payoff": advPayoff,
+    }
+
+# equilibrium classes reported by solve_2x2_arrays (the kind field holds the index)
+# - dominant:   a player has a strictly dominant strategy, the NE is pure and unique
+# - pure:       pure NE without strict dominance (e.g. two pure NE plus a mixed one)
+# - mixed:      no pure NE, the unique NE is the interior mixed one
+# - degenerate: a player is indifferent to everything, so there is a continuum of NE
+EQ_KINDS = ["dominant", "pure", "mixed", "degenerate"]
+DOMINANT, PURE, MIXED, DEGENERATE = range(len(EQ_KINDS))
+
+# record returned for every point by solve_2x2_arrays. x_star / y_star is the
+# reported NE (the pure one when there is one, otherwise the mixed one),
+# pure_profiles is a bitmask of the pure NE in (P,E), (P,T), (T,E), (T,T) order
+# (bit 0 = (P,E)) and mixed_x / mixed_y is the interior mixed NE, NaN if none
+EQ_DTYPE = [
+    ("kind", "i1"),
+    ("x_star", "f8"),
+    ("y_star", "f8"),
+    ("pure_profiles", "u1"),
+    ("mixed_x", "f8"),
+    ("mixed_y", "f8"),
+]
+
+# complete 2x2 solver for whole arrays of games. classifies every point instead
+# of raising, so failure-heavy grids need no python-level exception handling
+def solve_2x2_arrays(dcMatrix, advMatrix, tol=1e-12):
+    a, b, c, d = dcMatrix[..., 0, 0], dcMatrix[..., 0, 1], dcMatrix[..., 1, 0], dcMatrix[..., 1, 1]
+    e, f, g, h = advMatrix[..., 0, 0], advMatrix[..., 0, 1], advMatrix[..., 1, 0], advMatrix[..., 1, 1]
+
+    # how much better P is than T for DC against E / against T,
+    # and how much better E is than T for ADV against P / against T
+    dcVsE, dcVsT = a - c, b - d
+    advVsP, advVsT = e - f, g - h
+
+    # pure NE: neither player gains by deviating
+    purePE = (dcVsE >= -tol) & (advVsP >= -tol)
+    purePT = (dcVsT >= -tol) & (advVsP <= tol)
+    pureTE = (dcVsE <= tol) & (advVsT >= -tol)
+    pureTT = (dcVsT <= tol) & (advVsT <= tol)
+    pureProfiles = (purePE * 1 + purePT * 2 + pureTE * 4 + pureTT * 8).astype(np.uint8)
+
+    # interior mixed NE from the indifference conditions
+    mixedX, mixedY = compute_mixed_equilibrium_arrays(dcMatrix, advMatrix)
+    hasMixed = ~np.isnan(mixedX)
+    interiorX = (mixedX > tol) & (mixedX < 1.0 - tol)
+    interiorY = (mixedY > tol) & (mixedY < 1.0 - tol)
+
+    dcDominant = ((dcVsE > tol) & (dcVsT > tol)) | ((dcVsE < -tol) & (dcVsT < -tol))
+    advDominant = ((advVsP > tol) & (advVsT > tol)) | ((advVsP < -tol) & (advVsT < -tol))
+    dcIndifferent = (np.abs(dcVsE) <= tol) & (np.abs(dcVsT) <= tol)
+    advIndifferent = (np.abs(advVsP) <= tol) & (np.abs(advVsT) <= tol)
+    anyPure = pureProfiles > 0
+
+    kind = np.full(pureProfiles.shape, PURE, dtype=np.int8)
+    kind[~anyPure & hasMixed & interiorX & interiorY] = MIXED
+    kind[dcDominant | advDominant] = DOMINANT
+    kind[dcIndifferent | advIndifferent | (~anyPure & ~(hasMixed & interiorX & interiorY))] = DEGENERATE
+
+    # report the first pure NE in profile order, or the mixed one if there is none
+    firstPure = np.where(purePE, 0, np.where(purePT, 1, np.where(pureTE, 2, 3)))
+    xStar = np.where(anyPure, (firstPure < 2).astype(float), mixedX)
+    yStar = np.where(anyPure, (firstPure % 2 == 0).astype(float), mixedY)
+
+    result = np.empty(pureProfiles.shape, dtype=EQ_DTYPE)
+    result["kind"] = kind
+    result["x_star"] = xStar
+    result["y_star"] = yStar
+    result["pure_profiles"] = pureProfiles
+    result["mixed_x"] = mixedX
+    result["mixed_y"] = mixedY
+    return result
+
+# single-game version of solve_2x2_arrays, returns the record as a dict
+# with the kind as its name ("dominant", "pure", "mixed" or "degenerate")
+def solve_2x2(dcMatrix, advMatrix):
+    record = solve_2x2_arrays(np.asarray(dcMatrix, dtype=float), np.asarray(advMatrix, dtype=float))
+    solution = {name: record[name].item() for name in record.dtype.names}
+    solution["kind"] = EQ_KINDS[solution["kind"]]
+    return solution
+
+# max number of (params, p) results kept by solve_game (least recently used are dropped)
+SOLVE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=SOLVE_CACHE_SIZE)
+def _solve_game_cached(p, params):
+    dcMatrix, advMatrix = build_payoff_matrix(p, params)
+    solution = solve_2x2(dcMatrix, advMatrix)
+    metrics = equilibrium_metrics_from_mixed(p, params, dcMatrix, advMatrix, solution["x_star"], solution["y_star"])
+    return dcMatrix, advMatrix, solution, metrics
+
+# payoff matrices, solve_2x2 solution and equilibrium metrics at threshold p.
+# results are cached per (params, p), so repeated or overlapping sweeps with the
+# same parameters don't rebuild and re-solve the game. params needs scalar
+# fields to be hashable. copies are returned, so callers may modify them
+def solve_game(p, params):
+    dcMatrix, advMatrix, solution, metrics = _solve_game_cached(p, params)
+    return [row[:] for row in dcMatrix], [row[:] for row in advMatrix], dict(solution), dict(metrics)
+
+# hit / miss statistics and reset for the solve_game cache
+solve_game_cache_info = _solve_game_cached.cache_info
+clear_solve_game_cache = _solve_game_cached.cache_clear
@@ -0,0 +1,97 @@
+from dataclasses import replace
+import math
+import numpy as np
+from mechanisms import build_payoff_arrays, equilibrium_metrics_arrays, solve_2x2_arrays, EQ_KINDS
+
+# metrics optimize_p can target: +1 = maximize it, -1 = minimize it
+OBJECTIVES = {
+    "dc_payoff": 1.0,
+    "adv_payoff": 1.0,
+    "leakage_prob": -1.0,
+}
+
+# golden ratio step used by the golden-section search
+INV_PHI = (math.sqrt(5.0) - 1.0) / 2.0
+
+# equilibrium metrics at p for every parameter set (arrays broadcast together)
+def evaluate_p(p, params):
+    dcMatrix, advMatrix = build_payoff_arrays(p, params)
+    solution = solve_2x2_arrays(dcMatrix, advMatrix)
+    metrics = equilibrium_metrics_arrays(p, params, dcMatrix, advMatrix, solution["x_star"], solution["y_star"])
+    metrics["kind"] = solution["kind"]
+    return metrics
+
+# finds the data collector's best threshold p in [pMin, pMax] for many parameter
+# sets at once. GameParams fields given as keyword arrays of equal length define
+# the sets, e.g. optimize_p(params, alpha=alphas, gamma=gammas) solves
+# len(alphas) problems. a coarse scan of scanPoints values brackets the best p,
+# then a vectorized golden-section search narrows every bracket down to tol,
+# so each set costs about scanPoints + log(width / tol) / log(phi) evaluations
+# instead of a dense sweep. returns a structured array with one record per set
+def optimize_p(params, pMin=0.0, pMax=20.0, objective="dc_payoff", scanPoints=32, tol=1e-6, **paramValues):
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'")
+    sign = OBJECTIVES[objective]
+
+    columns = {name: np.atleast_1d(np.asarray(v, dtype=float)) for name, v in paramValues.items()}
+    numSets = len(next(iter(columns.values()))) if columns else 1
+    setParams = replace(params, **columns)
+
+    # score of p for every set (higher is better), p has shape (numSets, k)
+    def score(p, fieldParams):
+        return sign * evaluate_p(p, fieldParams)[objective]
+
+    # coarse scan to bracket the best p of each set
+    grid = np.linspace(pMin, pMax, scanPoints)
+    scanParams = replace(params, **{name: v[:, None] for name, v in columns.items()})
+    scanScores = np.broadcast_to(score(grid[None, :], scanParams), (numSets, scanPoints))
+    best = np.argmax(scanScores, axis=1)
+    lo = grid[np.maximum(best - 1, 0)]
+    hi = grid[np.minimum(best + 1, scanPoints - 1)]
+
+    # golden-section search inside each bracket, one new point per set per step.
+    # the objective jumps where the equilibrium kind switches, so the bracket can
+    # close in on a jump whose low side is worse than the scan; keep the best
+    # point actually evaluated (starting from the scan) instead of the midpoint
+    pOpt = grid[best]
+    fOpt = scanScores[np.arange(numSets), best]
+    c = hi - INV_PHI * (hi - lo)
+    d = lo + INV_PHI * (hi - lo)
+    fc, fd = score(c, setParams), score(d, setParams)
+    while True:
+        for point, value in ((c, fc), (d, fd)):
+            better = value > fOpt
+            pOpt, fOpt = np.where(better, point, pOpt), np.where(better, value, fOpt)
+        if np.max(hi - lo) <= tol:
+            break
+        keepLeft = fc > fd
+        hi = np.where(keepLeft, d, hi)
+        lo = np.where(keepLeft, lo, c)
+        newPoint = np.where(keepLeft, hi - INV_PHI * (hi - lo), lo + INV_PHI * (hi - lo))
+        fNew = score(newPoint, setParams)
+        c, d, fc, fd = (np.where(keepLeft, newPoint, d), np.where(keepLeft, c, newPoint),
+                        np.where(keepLeft, fNew, fd), np.where(keepLeft, fc, fNew))
+
+    metrics = evaluate_p(pOpt, setParams)
+    fields = list(columns) + ["p", objective, "x_star", "y_star"]
+    results = np.empty(numSets, dtype=[(name, "f8") for name in dict.fromkeys(fields)] + [("kind", "i1")])
+    for name, values in columns.items():
+        results[name] = values
+    results["p"] = pOpt
+    for name in ("x_star", "y_star", objective):
+        results[name] = metrics[name]
+    results["kind"] = metrics["kind"]
+    return results
+
+# number of objective evaluations optimize_p needs per parameter set
+def optimize_evaluations(pMin=0.0, pMax=20.0, scanPoints=32, tol=1e-6):
+    width = 2.0 * (pMax - pMin) / (scanPoints - 1)
+    steps = max(0, math.ceil(math.log(tol / width) / math.log(INV_PHI)))
+    return scanPoints + 2 + steps + 1
+
+# convenience wrapper for one parameter set: returns (p, metrics dict)
+def optimal_p(params, pMin=0.0, pMax=20.0, objective="dc_payoff", **kwargs):
+    record = optimize_p(params, pMin, pMax, objective, **kwargs)[0]
+    metrics = {name: record[name].item() for name in record.dtype.names}
+    metrics["kind"] = EQ_KINDS[metrics["kind"]]
+    return metrics["p"], metrics
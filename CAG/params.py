@@ -1,9 +1,11 @@
 from dataclasses import dataclass
-from math import exp
+from numpy import exp
 
 # constains all economic / privacy parameters for the CAG (Hide-and-Seek) game.
+# immutable and hashable so it can be used as a cache key (see solve_game in
+# mechanisms.py). use dataclasses.replace to get a modified copy
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GameParams:
     # adversary parameters
     advValueSuccess: float
@@ -23,6 +25,7 @@ class GameParams:
     gamma: float
 
     # functional forms in p
+    # (these also work when p or any coefficient is a numpy array, for grid sweeps)
 
     # probability adversary succeeds when DC protects with threshold p.
     def successProbProtected(self, p):
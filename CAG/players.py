@@ -15,6 +15,10 @@ class DataCollector:
         r = random.random()
         return "P" if r < x else "T"
 
+    # vectorized choose_action for n rounds at once: True where DC plays P
+    def choose_actions(self, x, n, rng):
+        return rng.random(n) < x
+
 @dataclass
 class Adversary:
     name: str = "Adversary"
@@ -22,3 +26,7 @@ class Adversary:
     def choose_action(self, y):
         r = random.random()
         return "E" if r < y else "T"
+
+    # vectorized choose_action for n rounds at once: True where ADV plays E
+    def choose_actions(self, y, n, rng):
+        return rng.random(n) < y
@@ -0,0 +1,129 @@
+from dataclasses import dataclass, field
+import numpy as np
+
+# population version of the CAG: a large population of symmetric data collectors
+# all using threshold p faces a population of attackers who each have their own
+# advValueSuccess (value) and advAttackCost (cost). x is the fraction of
+# collectors playing P, so an attack on a random collector succeeds with
+# qEff = x * successProbProtected(p) + (1 - x) * successProbTransparent, and an
+# attacker exploits exactly when value * qEff > cost. everything is computed
+# from arrays over the attackers, no per-agent objects are created
+
+# samplers for attacker parameters with the given mean and relative spread
+# (coefficient of variation). negative draws are clipped to 0
+def _lognormal(rng, mean, spread, n):
+    sigma2 = np.log1p(spread * spread)
+    return rng.lognormal(np.log(mean) - sigma2 / 2.0, np.sqrt(sigma2), n)
+
+def _normal(rng, mean, spread, n):
+    return np.maximum(rng.normal(mean, spread * mean, n), 0.0)
+
+def _uniform(rng, mean, spread, n):
+    half = np.sqrt(3.0) * spread * mean
+    return np.maximum(rng.uniform(mean - half, mean + half, n), 0.0)
+
+ATTACKER_DISTRIBUTIONS = {
+    "lognormal": _lognormal,
+    "normal": _normal,
+    "uniform": _uniform,
+}
+
+# metrics stored for every p by population_equilibrium
+POPULATION_METRICS = ["x_star", "attack_rate", "q_eff", "leakage_prob", "dc_payoff", "adv_payoff"]
+
+# the attacker population. an attacker exploits when qEff is above its
+# threshold cost / value, so the thresholds are sorted once (with prefix sums of
+# values and costs in the same order) and every later query is a binary search
+@dataclass
+class AttackerPopulation:
+    values: np.ndarray   # advValueSuccess of every attacker (>= 0)
+    costs: np.ndarray    # advAttackCost of every attacker
+
+    thresholds: np.ndarray = field(init=False, repr=False)
+    _valueSums: np.ndarray = field(init=False, repr=False)
+    _costSums: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.values = np.asarray(self.values, dtype=float)
+        self.costs = np.asarray(self.costs, dtype=float)
+
+        # attackers with no value only attack if attacking pays by itself
+        with np.errstate(divide="ignore", invalid="ignore"):
+            thresholds = np.where(self.values > 0.0, self.costs / self.values,
+                                  np.where(self.costs < 0.0, -np.inf, np.inf))
+        order = np.argsort(thresholds, kind="stable")
+        self.thresholds = thresholds[order]
+        self._valueSums = np.concatenate([[0.0], np.cumsum(self.values[order])])
+        self._costSums = np.concatenate([[0.0], np.cumsum(self.costs[order])])
+
+    def __len__(self):
+        return len(self.thresholds)
+
+    # fraction of attackers that strictly prefer to exploit at success probability q
+    def attack_rate(self, q):
+        return np.searchsorted(self.thresholds, q, side="left") / len(self)
+
+    # fraction that exploit or are indifferent at q
+    def attack_rate_max(self, q):
+        return np.searchsorted(self.thresholds, q, side="right") / len(self)
+
+    # average attacker payoff at q, each attacker best responding
+    def adv_payoff(self, q):
+        k = np.searchsorted(self.thresholds, q, side="left")
+        return (q * self._valueSums[k] - self._costSums[k]) / len(self)
+
+# draws numAttackers attackers whose value and cost are centered on
+# params.advValueSuccess and params.advAttackCost, with relative spread
+def generate_attackers(numAttackers, params, spread=0.25, distribution="lognormal", seed=None,
+                       valueSpread=None, costSpread=None):
+    if distribution not in ATTACKER_DISTRIBUTIONS:
+        raise ValueError(f"Unknown attacker distribution '{distribution}'")
+    sampler = ATTACKER_DISTRIBUTIONS[distribution]
+
+    rng = np.random.default_rng(seed)
+    values = sampler(rng, params.advValueSuccess, spread if valueSpread is None else valueSpread, numAttackers)
+    costs = sampler(rng, params.advAttackCost, spread if costSpread is None else costSpread, numAttackers)
+    return AttackerPopulation(values, costs)
+
+# equilibrium of the population game for every p in pValues at once.
+# collectors are indifferent between P and T exactly when the attack rate is
+#   aNeeded = (net(T) - net(P)) / (dcLossOnBreach * (successProbTransparent - successProbProtected(p)))
+# and the attack rate only grows with qEff, so the equilibrium qEff is the
+# threshold of the attacker that brings the rate up to aNeeded (attackers sitting
+# exactly on it are indifferent and make up the difference). when aNeeded is out
+# of reach every collector protects (x = 1) or none does (x = 0).
+# returns a structured array with one record per p: x* (fraction of collectors
+# protecting), the attack rate, qEff, leakage (chance that a given collector /
+# attacker pair ends in a breach) and the average collector and attacker payoffs
+def population_equilibrium(pValues, params, attackers):
+    p = np.atleast_1d(np.asarray(pValues, dtype=float))
+    qP = params.successProbProtected(p)
+    qT = params.successProbTransparent
+    netP = params.dcPrivacyBenefitProtected(p) - params.dcCostProtected(p)
+    netT = params.dcPrivacyBenefitTransparent - params.dcCostTransparent
+    lossGap = params.dcLossOnBreach * (qT - qP)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aNeeded = np.where(lossGap > 0.0, (netT - netP) / lossGap, np.where(netP >= netT, -np.inf, np.inf))
+
+    # qEff at which the attack rate reaches aNeeded, kept inside [qP, qT]
+    n = len(attackers)
+    index = np.clip(np.ceil(np.clip(aNeeded, 0.0, 1.0) * n).astype(np.int64) - 1, 0, n - 1)
+    qTarget = np.where(aNeeded <= 0.0, -np.inf, np.where(aNeeded > 1.0, np.inf, attackers.thresholds[index]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qEff = np.where(qT > qP, np.clip(qTarget, qP, qT), np.where(netP >= netT, qP, qT))
+        xStar = np.where(qT > qP, (qT - qEff) / (qT - qP), (netP >= netT).astype(float))
+
+    attackRate = np.clip(aNeeded, attackers.attack_rate(qEff), attackers.attack_rate_max(qEff))
+    payoffP = netP - params.dcLossOnBreach * qP * attackRate
+    payoffT = netT - params.dcLossOnBreach * qT * attackRate
+
+    results = np.empty(len(p), dtype=[(name, "f8") for name in ["p"] + POPULATION_METRICS])
+    results["p"] = p
+    results["x_star"] = xStar
+    results["attack_rate"] = attackRate
+    results["q_eff"] = qEff
+    results["leakage_prob"] = attackRate * qEff
+    results["dc_payoff"] = xStar * payoffP + (1.0 - xStar) * payoffT
+    results["adv_payoff"] = attackers.adv_payoff(qEff)
+    return results
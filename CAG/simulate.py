@@ -1,16 +1,115 @@
-from mechanisms import compute_mixed_equilibrium, build_payoff_matrix, equilibrium_metrics_from_mixed
+from dataclasses import replace
+import numpy as np
+from players import DataCollector, Adversary
+from mechanisms import (
+    build_payoff_arrays,
+    equilibrium_metrics_arrays,
+    solve_2x2_arrays,
+    solve_game,
+)
+
+# equilibrium metrics stored for every grid point by run_grid_sweep
+GRID_METRICS = ["x_star", "y_star", "leakage_prob", "dc_payoff", "adv_payoff"]
+
+# number of grid points evaluated per numpy pass (bounds the memory use)
+GRID_CHUNK = 1 << 18
+
+# metrics checked by simulate_rounds
+ROUND_METRICS = ["leakage_prob", "dc_payoff", "adv_payoff"]
+
+# z value for a two-sided 95% normal confidence interval
+Z_95 = 1.959963984540054
 
 # runs the game for different values for p to find the equlibrium between the data collector and adversary
 def run_p_sweep(pValues, params):
     results = {}
     for p in pValues:
-        # build separate DC and ADV payoff matrices
-        dcMatrix, advMatrix = build_payoff_matrix(p, params)
+        # build separate DC and ADV payoff matrices, solve the game (the mixed
+        # equilibrium (x*, y*) when it is interior, otherwise the pure / boundary
+        # one, instead of raising) and compute leakage and expected payoffs at
+        # equilibrium. repeated (params, p) pairs come from the solve_game cache
+        _, _, solution, metrics = solve_game(p, params)
+        metrics["kind"] = solution["kind"]
+        results[p] = metrics
+    return results
 
-        # compute mixed-strategy equilibrium (x*, y*)
-        xStar, yStar = compute_mixed_equilibrium(dcMatrix, advMatrix)
+# array version of run_p_sweep over a dense grid: p together with any GameParams
+# fields given as keyword arrays, e.g. run_grid_sweep(ps, params, alpha=alphas, gamma=gammas).
+# every combination is evaluated (p varies slowest), in vectorized chunks.
+# returns a structured array with one record per grid point: the swept values
+# followed by x*, y*, leakage and payoffs at the equilibrium found by
+# solve_2x2_arrays, its kind (index into EQ_KINDS) and pure NE bitmask
+def run_grid_sweep(pValues, params, **paramValues):
+    names = ["p"] + list(paramValues)
+    axes = [np.asarray(pValues, dtype=float)] + [np.asarray(v, dtype=float) for v in paramValues.values()]
+    shape = tuple(len(axis) for axis in axes)
+    total = int(np.prod(shape))
 
-        # compute leakage and expected payoffs at equilibrium
-        metrics = equilibrium_metrics_from_mixed(p, params, dcMatrix, advMatrix, xStar, yStar)
-        results[p] = metrics
+    dtype = [(name, "f8") for name in names + GRID_METRICS] + [("kind", "i1"), ("pure_profiles", "u1")]
+    results = np.empty(total, dtype=dtype)
+    for start in range(0, total, GRID_CHUNK):
+        stop = min(start + GRID_CHUNK, total)
+        index = np.unravel_index(np.arange(start, stop), shape)
+        values = {name: axis[i] for name, axis, i in zip(names, axes, index)}
+
+        p = values.pop("p")
+        gridParams = replace(params, **values)
+        dcMatrix, advMatrix = build_payoff_arrays(p, gridParams)
+        solution = solve_2x2_arrays(dcMatrix, advMatrix)
+        metrics = equilibrium_metrics_arrays(p, gridParams, dcMatrix, advMatrix,
+                                             solution["x_star"], solution["y_star"])
+
+        chunk = results[start:stop]
+        chunk["p"] = p
+        for name, value in values.items():
+            chunk[name] = value
+        for name in GRID_METRICS:
+            chunk[name] = metrics[name]
+        chunk["kind"] = solution["kind"]
+        chunk["pure_profiles"] = solution["pure_profiles"]
     return results
+
+# Monte Carlo check of equilibrium_metrics_from_mixed: plays `rounds` rounds at
+# threshold p with the DataCollector and Adversary mixing at the solved (x*, y*),
+# and every exploit succeeding with the p-dependent probability. rounds are
+# played in vectorized batches with a seeded generator. returns, for each
+# metric, the empirical mean, its 95% confidence interval and the analytical value
+def simulate_rounds(p, params, rounds=1_000_000, seed=None, batchSize=1 << 20):
+    _, _, solution, analytic = solve_game(p, params)
+    xStar, yStar = solution["x_star"], solution["y_star"]
+
+    rng = np.random.default_rng(seed)
+    collector = DataCollector()
+    adversary = Adversary()
+    successProb = {True: params.successProbProtected(p), False: params.successProbTransparent}
+    dcNetP = params.dcPrivacyBenefitProtected(p) - params.dcCostProtected(p)
+    dcNetT = params.dcPrivacyBenefitTransparent - params.dcCostTransparent
+
+    # running sum and sum of squares of each metric's per-round value
+    sums = {name: [0.0, 0.0] for name in ROUND_METRICS}
+    for start in range(0, rounds, batchSize):
+        n = min(batchSize, rounds - start)
+        protect = collector.choose_actions(xStar, n, rng)
+        exploit = adversary.choose_actions(yStar, n, rng)
+        success = exploit & (rng.random(n) < np.where(protect, successProb[True], successProb[False]))
+
+        perRound = {
+            "leakage_prob": success.astype(float),
+            "dc_payoff": np.where(protect, dcNetP, dcNetT) - params.dcLossOnBreach * success,
+            "adv_payoff": np.where(exploit, params.advValueSuccess * success - params.advAttackCost, 0.0),
+        }
+        for name, values in perRound.items():
+            sums[name][0] += float(values.sum())
+            sums[name][1] += float((values * values).sum())
+
+    report = {"p": p, "rounds": rounds, "x_star": xStar, "y_star": yStar, "kind": solution["kind"]}
+    for name, (total, totalSq) in sums.items():
+        mean = total / rounds
+        variance = max(totalSq / rounds - mean * mean, 0.0) * rounds / max(rounds - 1, 1)
+        halfWidth = Z_95 * float(np.sqrt(variance / rounds))
+        report[name] = {
+            "empirical": mean,
+            "ci": (mean - halfWidth, mean + halfWidth),
+            "analytic": float(analytic[name]),
+        }
+    return report
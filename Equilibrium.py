@@ -0,0 +1,263 @@
+#File containing a Nash equilibrium solver for two player (bimatrix) games
+
+# Equilibrium.py
+from __future__ import annotations
+from itertools import combinations
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Largest number of actions (per player) for which solve_bimatrix uses support
+# enumeration by default; bigger games use Lemke-Howson.
+SUPPORT_ENUMERATION_MAX_ACTIONS = 6
+
+
+def is_nash(A, B, x, y, tol: float = 1e-9):
+    """
+    Check whether (x, y) is a Nash equilibrium of the bimatrix game (A, B).
+
+    Args:
+      A, B: payoff matrices of the row / column player, shape (..., m, n);
+            A[i][j] is the row player's payoff when it plays i and the column player plays j
+      x, y: mixed strategies of the row / column player, shape (..., m) and (..., n)
+      tol:  allowed gain from deviating to a pure strategy
+
+    Returns:
+      bool, or a boolean array for batches of games
+    """
+    A, B = np.asarray(A, dtype=float), np.asarray(B, dtype=float)
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    rowPayoffs = np.einsum("...ij,...j->...i", A, y)
+    colPayoffs = np.einsum("...i,...ij->...j", x, B)
+    rowValue = np.einsum("...i,...i->...", x, rowPayoffs)
+    colValue = np.einsum("...j,...j->...", y, colPayoffs)
+    return ((rowPayoffs.max(axis=-1) <= rowValue + tol)
+            & (colPayoffs.max(axis=-1) <= colValue + tol))
+
+
+def _indifference(M, tol: float):
+    """
+    Solve M z = v * 1, sum(z) = 1 for a stack of square matrices M (N, k, k).
+
+    Returns (z, v, ok) where ok marks the systems that had a unique solution.
+    """
+    N, k, _ = M.shape
+    system = np.zeros((N, k + 1, k + 1))
+    system[:, :k, :k] = M
+    system[:, :k, k] = -1.0
+    system[:, k, :k] = 1.0
+    rhs = np.zeros((N, k + 1))
+    rhs[:, k] = 1.0
+
+    ok = np.abs(np.linalg.det(system)) > tol
+    solution = np.full((N, k + 1), np.nan)
+    if ok.any():
+        solution[ok] = np.linalg.solve(system[ok], rhs[ok][:, :, None])[:, :, 0]
+    return solution[:, :k], solution[:, k], ok
+
+
+def support_enumeration(A, B, tol: float = 1e-9) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Find all Nash equilibria of a (nondegenerate) bimatrix game by support enumeration.
+
+    Every pair of equal-size supports (I, J) is checked: the column strategy on J
+    must make the row player indifferent over I and vice versa, with no better
+    reply outside the supports. All pairs of the same size are solved at once
+    as one stacked NumPy linear system, so a 10x10 game (~185k support pairs)
+    takes about a second. The number of pairs grows like C(m + n, m), so
+    use lemke_howson for larger games.
+
+    Returns:
+      list of (x, y) mixed strategy pairs
+    """
+    A, B = np.asarray(A, dtype=float), np.asarray(B, dtype=float)
+    m, n = A.shape
+    equilibria: List[Tuple[np.ndarray, np.ndarray]] = []
+    seen = set()
+    for k in range(1, min(m, n) + 1):
+        rows = np.array(list(combinations(range(m), k)))
+        cols = np.array(list(combinations(range(n), k)))
+        I = np.repeat(rows, len(cols), axis=0)
+        J = np.tile(cols, (len(rows), 1))
+
+        # y on J making the row player indifferent over I, x on I likewise for the column player
+        y, v, okY = _indifference(A[I[:, :, None], J[:, None, :]], tol)
+        x, u, okX = _indifference(B[I[:, :, None], J[:, None, :]].transpose(0, 2, 1), tol)
+        ok = okX & okY & (x >= -tol).all(axis=1) & (y >= -tol).all(axis=1)
+        if not ok.any():
+            continue
+
+        I, J, x, y, u, v = I[ok], J[ok], x[ok], y[ok], u[ok], v[ok]
+        xFull = np.zeros((len(I), m))
+        yFull = np.zeros((len(J), n))
+        np.put_along_axis(xFull, I, np.clip(x, 0.0, None), axis=1)
+        np.put_along_axis(yFull, J, np.clip(y, 0.0, None), axis=1)
+
+        # no pure strategy outside the supports may do better
+        best = (((yFull @ A.T) <= v[:, None] + tol).all(axis=1)
+                & ((xFull @ B) <= u[:, None] + tol).all(axis=1))
+        for xs, ys in zip(xFull[best], yFull[best]):
+            key = (tuple(np.round(xs, 9)), tuple(np.round(ys, 9)))
+            if key not in seen:
+                seen.add(key)
+                equilibria.append((xs, ys))
+    return equilibria
+
+
+def _pivot(T, basis, entering, active, slack: slice, tol: float):
+    """
+    One Lemke-Howson pivot on every active game of a stack of tableaux.
+
+    The entering column of each game is chosen by the caller; the leaving row is
+    picked by the lexicographic minimum ratio test (rhs first, then the slack
+    columns), which keeps degenerate games from cycling.
+
+    Returns the label that left the basis in each game (-1 for inactive games).
+    """
+    G, rows, _ = T.shape
+    leaving = np.full(G, -1)
+    idx = np.nonzero(active)[0]
+    c = entering[idx]
+    col = T[idx, :, c]
+    candidates = col > tol
+
+    keys = [T[idx, :, -1]] + [T[idx, :, j] for j in range(slack.start, slack.stop)]
+    safeCol = np.where(candidates, col, 1.0)
+    for key in keys:
+        ratio = np.where(candidates, key / safeCol, np.inf)
+        best = ratio.min(axis=1, keepdims=True)
+        candidates &= ratio <= best + tol * (1.0 + np.abs(best))
+        if (candidates.sum(axis=1) <= 1).all():
+            break
+
+    # games without a candidate row (unbounded direction) are left as they are
+    found = candidates.any(axis=1)
+    idx, c, col, candidates = idx[found], c[found], col[found], candidates[found]
+    row = np.argmax(candidates, axis=1)
+
+    pivotRow = T[idx, row, :] / col[np.arange(len(idx)), row][:, None]
+    T[idx] -= col[:, :, None] * pivotRow[:, None, :]
+    T[idx, row, :] = pivotRow
+    leaving[idx] = basis[idx, row]
+    basis[idx, row] = c
+    return leaving
+
+
+def lemke_howson_batch(A, B, initial_label: int = 0, max_pivots: Optional[int] = None,
+                       tol: float = 1e-12) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find one Nash equilibrium of each of many same-shape bimatrix games at once.
+
+    Args:
+      A, B: payoff matrices of shape (G, m, n) (or (m, n) for a single game)
+      initial_label: the label (0..m-1 for row actions, m..m+n-1 for column actions)
+                     dropped to start the path; different labels can reach different equilibria
+      max_pivots: safety limit on the path length, games that hit it return NaN
+
+    Returns:
+      (x, y) with shapes (G, m) and (G, n)
+
+    All games pivot together: the path alternates between the row and the column
+    tableau, so every step is one vectorized pivot over the still-running games.
+    """
+    A, B = np.asarray(A, dtype=float), np.asarray(B, dtype=float)
+    single = A.ndim == 2
+    if single:
+        A, B = A[None], B[None]
+    G, m, n = A.shape
+    if not 0 <= initial_label < m + n:
+        raise ValueError(f"Unknown initial label '{initial_label}'")
+    if max_pivots is None:
+        max_pivots = 50 * (m + n) + 100
+
+    # adding a constant to a player's payoffs keeps the equilibria, and
+    # Lemke-Howson needs every payoff to be positive
+    A = A + (1.0 - A.min(axis=(1, 2)))[:, None, None]
+    B = B + (1.0 - B.min(axis=(1, 2)))[:, None, None]
+
+    # columns are the labels 0..m+n-1 followed by the right hand side.
+    # rowTableau: A y + r = 1 (r_i has label i, y_j has label m + j)
+    # colTableau: B^T x + s = 1 (x_i has label i, s_j has label m + j)
+    rowTableau = np.zeros((G, m, m + n + 1))
+    rowTableau[:, :, :m] = np.eye(m)
+    rowTableau[:, :, m:m + n] = A
+    rowTableau[:, :, -1] = 1.0
+    rowBasis = np.tile(np.arange(m), (G, 1))
+
+    colTableau = np.zeros((G, n, m + n + 1))
+    colTableau[:, :, :m] = B.transpose(0, 2, 1)
+    colTableau[:, :, m:m + n] = np.eye(n)
+    colTableau[:, :, -1] = 1.0
+    colBasis = np.tile(np.arange(m, m + n), (G, 1))
+
+    entering = np.full(G, initial_label)
+    active = np.ones(G, dtype=bool)
+    failed = np.zeros(G, dtype=bool)
+    # row labels start out non-basic in the column tableau, column labels in the row tableau
+    inColTableau = initial_label < m
+    for _ in range(max_pivots):
+        if inColTableau:
+            leaving = _pivot(colTableau, colBasis, entering, active, slice(m, m + n), tol)
+        else:
+            leaving = _pivot(rowTableau, rowBasis, entering, active, slice(0, m), tol)
+        failed |= active & (leaving < 0)
+        active &= (leaving != initial_label) & (leaving >= 0)
+        entering = np.where(active, leaving, entering)
+        inColTableau = not inColTableau
+        if not active.any():
+            break
+    failed |= active
+
+    # read the basic variables off the tableaux (labels are unique within a basis)
+    games = np.arange(G)[:, None]
+    colValues = np.zeros((G, m + n))
+    colValues[games, colBasis] = colTableau[:, :, -1]
+    rowValues = np.zeros((G, m + n))
+    rowValues[games, rowBasis] = rowTableau[:, :, -1]
+    x, y = colValues[:, :m], rowValues[:, m:]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = np.clip(x, 0.0, None)
+        y = np.clip(y, 0.0, None)
+        x /= x.sum(axis=1, keepdims=True)
+        y /= y.sum(axis=1, keepdims=True)
+    x[failed] = np.nan
+    y[failed] = np.nan
+
+    if single:
+        return x[0], y[0]
+    return x, y
+
+
+def lemke_howson(A, B, initial_label: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Find one Nash equilibrium (x, y) of a single bimatrix game with Lemke-Howson."""
+    return lemke_howson_batch(A, B, initial_label)
+
+
+def solve_bimatrix(A, B, method: str = "auto") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find one Nash equilibrium (x, y) of the bimatrix game (A, B).
+
+    method:
+      - "support_enumeration": first equilibrium found by support_enumeration
+      - "lemke_howson": lemke_howson with initial label 0
+      - "auto": support enumeration for games with at most
+                SUPPORT_ENUMERATION_MAX_ACTIONS actions per player, otherwise Lemke-Howson
+    """
+    A, B = np.asarray(A, dtype=float), np.asarray(B, dtype=float)
+    if A.shape != B.shape or A.ndim != 2:
+        raise ValueError(f"Payoff matrices must be m x n and the same shape, got {A.shape} and {B.shape}")
+
+    if method == "auto":
+        method = "support_enumeration" if max(A.shape) <= SUPPORT_ENUMERATION_MAX_ACTIONS else "lemke_howson"
+
+    if method == "support_enumeration":
+        equilibria = support_enumeration(A, B)
+        if equilibria:
+            return equilibria[0]
+        # degenerate games can hide their equilibria from equal-size supports
+        return lemke_howson(A, B)
+    if method == "lemke_howson":
+        return lemke_howson(A, B)
+    raise ValueError(f"Unknown method '{method}'")
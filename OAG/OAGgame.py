@@ -1,94 +1,101 @@
 from player import Owner, Adversary, OwnerAction, AdversaryAction
 
+# actions in table order (position = enum value)
+OWNER_ACTIONS = tuple(sorted(OwnerAction, key=lambda action: action.value))
+ADVERSARY_ACTIONS = tuple(sorted(AdversaryAction, key=lambda action: action.value))
+
 class OAGGame:
     def __init__(self, owner: Owner, adversary: Adversary):
         self.owner = owner
         self.adversary = adversary
 
-    def payoff(self, owner_action: OwnerAction, adv_action: AdversaryAction):
-        U  = self.owner.U
-        P  = self.owner.P
-        C_p = self.owner.C_p
-        gamma = self.owner.gamma
-
-        G  = self.adversary.G
-        C_a = self.adversary.C_a
-
-        # Protect | Attack
-        if owner_action == OwnerAction.PROTECT and adv_action == AdversaryAction.ATTACK:
-            return (U - C_p - gamma * P,gamma * G - C_a)
-
-        # Protect | Abstain
-        if owner_action == OwnerAction.PROTECT and adv_action == AdversaryAction.ABSTAIN:
-            return (U - C_p,0)
-
-        # Defect | Attack
-        if owner_action == OwnerAction.DEFECT and adv_action == AdversaryAction.ATTACK:
-            return (U - P,G - C_a)
+        # payoff table and the results derived from it, rebuilt by payoff_table()
+        # whenever the owner / adversary parameters they were computed from change
+        self._table = None
+        self._table_params = None
+        self._solved = {}
+
+    # payoff table [owner_action.value][adv_action.value] -> (owner payoff, adversary payoff)
+    def payoff_table(self):
+        params = (self.owner.U, self.owner.P, self.owner.C_p, self.owner.gamma,
+                  self.adversary.G, self.adversary.C_a)
+        if params != self._table_params:
+            U, P, C_p, gamma, G, C_a = params
+            self._table = (
+                # Protect | Attack, Protect | Abstain
+                ((U - C_p - gamma * P, gamma * G - C_a), (U - C_p, 0)),
+                # Defect | Attack, Defect | Abstain
+                ((U - P, G - C_a), (U, 0)),
+            )
+            self._table_params = params
+            self._solved = {}
+        return self._table
 
-        # Defect | Abstain
-        if owner_action == OwnerAction.DEFECT and adv_action == AdversaryAction.ABSTAIN:
-            return (U,0)
+    def payoff(self, owner_action: OwnerAction, adv_action: AdversaryAction):
+        if isinstance(owner_action, OwnerAction) and isinstance(adv_action, AdversaryAction):
+            return self.payoff_table()[owner_action.value][adv_action.value]
 
         print("Invalid action, Don't know how you even got here")
 
     def all_profiles(self):
-        profiles = []
-        for o_act in OwnerAction:
-            for a_act in AdversaryAction:
-                payoff = self.payoff(o_act, a_act)
-                profiles.append((o_act, a_act, payoff))
-        return profiles
+        table = self.payoff_table()
+        return [(o_act, a_act, table[i][j])
+                for i, o_act in enumerate(OWNER_ACTIONS) for j, a_act in enumerate(ADVERSARY_ACTIONS)]
+
+    def _best_responses(self):
+        table = self.payoff_table()
+        if "best" not in self._solved:
+            # Owner best responses
+            owner_best = {}
+            for j, a_act in enumerate(ADVERSARY_ACTIONS):
+                column = [row[j][0] for row in table]
+                max_owner = max(column)
+                owner_best[a_act] = {o_act for o_act, value in zip(OWNER_ACTIONS, column) if value == max_owner}
+
+            # Adversary best responses
+            adv_best = {}
+            for i, o_act in enumerate(OWNER_ACTIONS):
+                row = [cell[1] for cell in table[i]]
+                max_adv = max(row)
+                adv_best[o_act] = {a_act for a_act, value in zip(ADVERSARY_ACTIONS, row) if value == max_adv}
+
+            self._solved["best"] = (owner_best, adv_best)
+        return self._solved["best"]
 
     def best_responses(self):
-        profiles = self.all_profiles()
-
-        # Owner best responses
-        owner_best = {}
-        for a_act in AdversaryAction:
-            subset = [p for p in profiles if p[1] == a_act]
-            max_owner = max(p[2][0] for p in subset)
-            owner_best[a_act] = {p[0] for p in subset if p[2][0] == max_owner}
-
-        # Adversary best responses
-        adv_best = {}
-        for o_act in OwnerAction:
-            subset = [p for p in profiles if p[0] == o_act]
-            max_adv = max(p[2][1] for p in subset)
-            adv_best[o_act] = {p[1] for p in subset if p[2][1] == max_adv}
-
-        return owner_best, adv_best
+        owner_best, adv_best = self._best_responses()
+        return ({a_act: set(best) for a_act, best in owner_best.items()},
+                {o_act: set(best) for o_act, best in adv_best.items()})
 
     def pure_equilibria(self):
-        owner_best, adv_best = self.best_responses()
-        equilibria = []
-
-        for o_act in OwnerAction:
-            for a_act in AdversaryAction:
-                if o_act in owner_best[a_act] and a_act in adv_best[o_act]:
-                    equilibria.append((o_act, a_act))
+        owner_best, adv_best = self._best_responses()
+        if "pure" not in self._solved:
+            self._solved["pure"] = [(o_act, a_act) for o_act in OWNER_ACTIONS for a_act in ADVERSARY_ACTIONS
+                                    if o_act in owner_best[a_act] and a_act in adv_best[o_act]]
+        return list(self._solved["pure"])
 
-        return equilibria
-    
     def mixed_equilibrium(self):
-        a, e = self.payoff(OwnerAction.PROTECT, AdversaryAction.ATTACK)
-        b, _ = self.payoff(OwnerAction.PROTECT, AdversaryAction.ABSTAIN)
-        c, g = self.payoff(OwnerAction.DEFECT, AdversaryAction.ATTACK)
-        d, _ = self.payoff(OwnerAction.DEFECT, AdversaryAction.ABSTAIN)
-
-        denom_q = (a - b - c + d)
-        denom_p = (g - e)
-
-        if abs(denom_q) < 1e-8 or abs(denom_p) < 1e-8:
-            return None
-        
-        # probability of attack & protect
-        q = (d - b) / denom_q 
-        p = g / denom_p
-
-        return {
-            "Probability Owner Protects": p,
-            "Probability Owner Defects": 1 - p,
-            "Probability Adversary Attacks": q,
-            "Probability Adversary Abstains": 1 - q
-        }
+        table = self.payoff_table()
+        if "mixed" not in self._solved:
+            (a, e), (b, _) = table[OwnerAction.PROTECT.value]
+            (c, g), (d, _) = table[OwnerAction.DEFECT.value]
+
+            denom_q = (a - b - c + d)
+            denom_p = (g - e)
+
+            mixed = None
+            if abs(denom_q) >= 1e-8 and abs(denom_p) >= 1e-8:
+                # probability of attack & protect
+                q = (d - b) / denom_q
+                p = g / denom_p
+
+                mixed = {
+                    "Probability Owner Protects": p,
+                    "Probability Owner Defects": 1 - p,
+                    "Probability Adversary Attacks": q,
+                    "Probability Adversary Abstains": 1 - q
+                }
+            self._solved["mixed"] = mixed
+
+        mixed = self._solved["mixed"]
+        return None if mixed is None else dict(mixed)
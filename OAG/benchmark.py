@@ -0,0 +1,49 @@
+import sys
+import time
+from OAGgame import OAGGame
+from player import Owner, Adversary
+from simulate import sweep_Cp_Ca
+
+# per-game solve time (pure_equilibria + mixed_equilibrium): on fresh games,
+# which build their payoff table once, and repeated on one game, which reuses it
+def bench_solve(games=20_000, repeats=5):
+    fresh = [OAGGame(Owner(U=3.0, P=10.0, C_p=0.4 + i * 1e-5, gamma=0.1), Adversary(G=25.0, C_a=1.0))
+             for i in range(games)]
+    print("OAGGame solve time per game (best of %d):" % repeats)
+
+    best = float("inf")
+    for _ in range(repeats):
+        for game in fresh:
+            game._table_params = None
+        start = time.perf_counter()
+        for game in fresh:
+            game.pure_equilibria()
+            game.mixed_equilibrium()
+        best = min(best, time.perf_counter() - start)
+    print(f"  fresh game    {best / games * 1e6:8.2f} us")
+
+    game = fresh[0]
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(games):
+            game.pure_equilibria()
+            game.mixed_equilibrium()
+        best = min(best, time.perf_counter() - start)
+    print(f"  same game     {best / games * 1e6:8.2f} us")
+
+# per-cell time of the object based sweep_Cp_Ca
+def bench_sweep(size=200):
+    Cp_vals = [i * 5.0 / size for i in range(size)]
+    Ca_vals = [i * 30.0 / size for i in range(size)]
+    start = time.perf_counter()
+    sweep_Cp_Ca(U=3.0, P=10.0, G=25.0, gamma=0.1, Cp_vals=Cp_vals, Ca_vals=Ca_vals)
+    elapsed = time.perf_counter() - start
+    print(f"sweep_Cp_Ca {size}x{size}: {elapsed / size ** 2 * 1e6:8.2f} us per cell")
+
+BENCHMARKS = {"solve": bench_solve, "sweep": bench_sweep}
+
+# usage: python benchmark.py [solve] [sweep]  (all benchmarks by default)
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
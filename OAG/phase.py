@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+import numpy as np
+from OAGgame import OAGGame
+from player import Owner, Adversary, OwnerAction, AdversaryAction
+from simulate import classify_arrays
+
+# the best responses only depend on the signs of four payoff differences, each
+# affine in (C_p, C_a). reading them off OAGGame.payoff gives, for the game as
+# written, the phase boundaries
+#   owner_vs_attack:  C_p = (1 - gamma) * P
+#   owner_vs_abstain: C_p = 0
+#   adv_vs_protect:   C_a = gamma * G
+#   adv_vs_defect:    C_a = G
+# (U cancels out). phase_diagram uses them to only evaluate the game near a boundary
+
+# the four payoff differences (positive = first action is the better reply) for one game
+def boundary_values(game):
+    protect_attack = game.payoff(OwnerAction.PROTECT, AdversaryAction.ATTACK)
+    protect_abstain = game.payoff(OwnerAction.PROTECT, AdversaryAction.ABSTAIN)
+    defect_attack = game.payoff(OwnerAction.DEFECT, AdversaryAction.ATTACK)
+    defect_abstain = game.payoff(OwnerAction.DEFECT, AdversaryAction.ABSTAIN)
+    return {
+        "owner_vs_attack": protect_attack[0] - defect_attack[0],
+        "owner_vs_abstain": protect_abstain[0] - defect_abstain[0],
+        "adv_vs_protect": protect_attack[1] - protect_abstain[1],
+        "adv_vs_defect": defect_attack[1] - defect_abstain[1],
+    }
+
+# coefficients (c0, c_Cp, c_Ca) of every boundary function c0 + c_Cp * C_p + c_Ca * C_a,
+# found by evaluating OAGGame.payoff at three cost points
+def boundary_coefficients(U, P, G, gamma):
+    def values_at(C_p, C_a):
+        return boundary_values(OAGGame(Owner(U=U, P=P, C_p=C_p, gamma=gamma), Adversary(G=G, C_a=C_a)))
+
+    origin, unit_Cp, unit_Ca = values_at(0.0, 0.0), values_at(1.0, 0.0), values_at(0.0, 1.0)
+    return {name: (c0, unit_Cp[name] - c0, unit_Ca[name] - c0) for name, c0 in origin.items()}
+
+@dataclass
+class PhaseDiagram:
+    Cp_vals: np.ndarray
+    Ca_vals: np.ndarray
+    labels: np.ndarray        # (len(Cp_vals), len(Ca_vals)) index into simulate.LABELS
+    boundaries: dict          # boundary name -> (c0, c_Cp, c_Ca)
+    evaluations: int          # grid points where payoffs were evaluated
+
+# labels the (C_p, C_a) grid like sweep_Cp_Ca_grid, but by quadtree refinement:
+# a block of grid points whose corners are all strictly on the same side of
+# every boundary can't contain a boundary (the functions are affine), so it
+# gets the label of one point. only blocks that a boundary crosses are split,
+# down to single points, so the work grows with the boundary length instead of
+# the grid area. Cp_vals and Ca_vals must be sorted, so that the corners of a
+# block are its extremes
+def phase_diagram(U, P, G, gamma, Cp_vals, Ca_vals, tol=1e-9):
+    Cp_vals = np.asarray(Cp_vals, dtype=float)
+    Ca_vals = np.asarray(Ca_vals, dtype=float)
+    if (np.diff(Cp_vals) < 0).any() or (np.diff(Ca_vals) < 0).any():
+        raise ValueError("Cp_vals and Ca_vals must be sorted")
+    coefficients = boundary_coefficients(U, P, G, gamma)
+    labels = np.empty((len(Cp_vals), len(Ca_vals)), dtype=np.int8)
+    evaluations = 0
+
+    def classify(i, j):
+        return classify_arrays(U, P, Cp_vals[i], gamma, G, Ca_vals[j])["label"]
+
+    # blocks as half-open index ranges [i0, i1) x [j0, j1)
+    i0, i1 = np.array([0]), np.array([len(Cp_vals)])
+    j0, j1 = np.array([0]), np.array([len(Ca_vals)])
+    while len(i0):
+        single = (i1 - i0 == 1) & (j1 - j0 == 1)
+        labels[i0[single], j0[single]] = classify(i0[single], j0[single])
+        evaluations += int(single.sum())
+        i0, i1, j0, j1 = i0[~single], i1[~single], j0[~single], j1[~single]
+
+        # signs of every boundary function at the four corners of each block
+        corners_Cp = Cp_vals[np.stack([i0, i0, i1 - 1, i1 - 1])]
+        corners_Ca = Ca_vals[np.stack([j0, j1 - 1, j0, j1 - 1])]
+        evaluations += 4 * len(i0)
+        uniform = np.ones(len(i0), dtype=bool)
+        for c0, c_Cp, c_Ca in coefficients.values():
+            values = c0 + c_Cp * corners_Cp + c_Ca * corners_Ca
+            margin = tol * (1.0 + abs(c0) + np.abs(c_Cp * corners_Cp) + np.abs(c_Ca * corners_Ca))
+            uniform &= (values > margin).all(axis=0) | (values < -margin).all(axis=0)
+
+        block_labels = classify(i0[uniform], j0[uniform])
+        for a, b, c, d, label in zip(i0[uniform], i1[uniform], j0[uniform], j1[uniform], block_labels):
+            labels[a:b, c:d] = label
+        evaluations += int(uniform.sum())
+
+        # split the others in half along each side longer than one point
+        i0, i1, j0, j1 = i0[~uniform], i1[~uniform], j0[~uniform], j1[~uniform]
+        i_mid = (i0 + i1 + 1) // 2
+        j_mid = (j0 + j1 + 1) // 2
+        i0, i1 = np.concatenate([i0, i0, i_mid, i_mid]), np.concatenate([i_mid, i_mid, i1, i1])
+        j0, j1 = np.concatenate([j0, j_mid, j0, j_mid]), np.concatenate([j_mid, j1, j_mid, j1])
+        keep = (i1 > i0) & (j1 > j0)
+        i0, i1, j0, j1 = i0[keep], i1[keep], j0[keep], j1[keep]
+
+    return PhaseDiagram(Cp_vals, Ca_vals, labels, coefficients, evaluations)
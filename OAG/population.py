@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+import numpy as np
+
+# population version of the OAG: a city of owners, each with its own U, P, C_p
+# and gamma, against one adversary with gain G and cost C_a per attack and a
+# total attack budget. the adversary picks an attack probability q_i for every
+# owner (its targeting), spending C_a * sum(q_i) in expectation, and every owner
+# picks its probability x_i of protecting.
+#
+# with the budget binding, the adversary attacks as if each attack cost
+# C_a * (1 + price), where price >= 0 is the shadow price of the budget. for a
+# given price every owner / adversary pair is an ordinary OAG game, solved for
+# all owners at once with arrays; the price is then searched for so that the
+# expected spend matches the budget. each search step is one pass over the owner
+# arrays, and no per-owner objects are created
+
+@dataclass
+class OwnerPopulation:
+    U: np.ndarray
+    P: np.ndarray
+    C_p: np.ndarray
+    gamma: np.ndarray
+
+    def __len__(self):
+        return len(self.U)
+
+# draws owners whose U, P, C_p and gamma are lognormal around the given values
+# with relative spread (gamma is capped at 1, which only matters when gamma is
+# close to 1; nothing piles up at gamma = 0)
+def generate_owners(num_owners, U=3.0, P=10.0, C_p=0.4, gamma=0.1, spread=0.25, seed=None):
+    rng = np.random.default_rng(seed)
+    sigma = np.sqrt(np.log1p(spread * spread))
+
+    def lognormal(mean):
+        return mean * rng.lognormal(-sigma * sigma / 2.0, sigma, num_owners)
+
+    return OwnerPopulation(
+        U=lognormal(U),
+        P=lognormal(P),
+        C_p=lognormal(C_p),
+        gamma=np.minimum(lognormal(gamma), 1.0),
+    )
+
+# equilibrium (x = prob protect, q = prob attacked) of every owner's game against
+# an adversary whose attack costs C_a_eff, with the same payoffs as OAGGame.payoff.
+# an owner with a dominant action plays it and the adversary best responds, then
+# the same for the adversary, and otherwise both mix
+def _pair_equilibrium(owners, G, C_a_eff):
+    owner_vs_attack = (1.0 - owners.gamma) * owners.P - owners.C_p   # protect - defect when attacked
+    owner_vs_abstain = -owners.C_p                                    # protect - defect when not attacked
+    adv_vs_protect = owners.gamma * G - C_a_eff                       # attack - abstain vs a protecting owner
+    adv_vs_defect = G - C_a_eff                                       # attack - abstain vs a defecting owner
+
+    owner_protects = (owner_vs_attack > 0) & (owner_vs_abstain > 0)
+    owner_defects = (owner_vs_attack <= 0) & (owner_vs_abstain <= 0)
+    adv_attacks = (adv_vs_protect > 0) & (adv_vs_defect > 0)
+    adv_abstains = (adv_vs_protect <= 0) & (adv_vs_defect <= 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = adv_vs_defect / (adv_vs_defect - adv_vs_protect)
+        q = owner_vs_abstain / (owner_vs_abstain - owner_vs_attack)
+
+    x = np.where(adv_attacks, owner_vs_attack > 0, np.where(adv_abstains, owner_vs_abstain > 0, x))
+    q = np.where(adv_attacks, 1.0, np.where(adv_abstains, 0.0, q))
+    x = np.where(owner_protects, 1.0, np.where(owner_defects, 0.0, x))
+    q = np.where(owner_protects, adv_vs_protect > 0, np.where(owner_defects, adv_vs_defect > 0, q))
+    return x.astype(float), q.astype(float)
+
+# population equilibrium against an adversary with gain G, cost C_a per attack
+# and a total expected attack budget (None = no limit). the targeting of an owner
+# only changes where C_a * (1 + price) crosses gamma_i * G or G, so the price is
+# found by binary search over those breakpoints (about log2(owners) passes).
+# returns a dict with the per-owner protect / attack probabilities, the owners'
+# expected payoffs, and the aggregates: fraction of owners protecting, expected
+# number of attacks, adversary spend and payoff, and the budget's shadow price
+def population_equilibrium(owners, G, C_a, budget=None):
+    x, q = _pair_equilibrium(owners, G, C_a)
+    price = 0.0
+
+    if budget is not None and C_a > 0 and C_a * q.sum() > budget:
+        # the spend is constant between breakpoints and takes its right-hand
+        # value on them; at the last one no attack pays off, so it is 0 there
+        breakpoints = np.unique(np.append(owners.gamma * G, G)) / C_a - 1.0
+        breakpoints = breakpoints[breakpoints > 0]
+        low, high = -1, len(breakpoints) - 1
+        q_low = q
+        q_high = _pair_equilibrium(owners, G, C_a * (1.0 + breakpoints[high]))[1]
+        while high - low > 1:
+            mid = (low + high) // 2
+            q_mid = _pair_equilibrium(owners, G, C_a * (1.0 + breakpoints[mid]))[1]
+            if C_a * q_mid.sum() > budget:
+                low, q_low = mid, q_mid
+            else:
+                high, q_high = mid, q_mid
+        price = float(breakpoints[high])
+
+        # the owners whose targeting changes at the price are the ones the
+        # adversary is indifferent about; it attacks them just enough to use up
+        # the budget, and they best respond to that
+        spend_low, spend_high = C_a * q_low.sum(), C_a * q_high.sum()
+        share = (budget - spend_high) / (spend_low - spend_high)
+        x, _ = _pair_equilibrium(owners, G, C_a * (1.0 + price))
+        q = q_high + share * (q_low - q_high)
+        changed = q_low != q_high
+        protect_gain = q * ((1.0 - owners.gamma) * owners.P - owners.C_p) - (1.0 - q) * owners.C_p
+        x = np.where(changed, (protect_gain > 0).astype(float), x)
+
+    loss = owners.P * (x * owners.gamma + (1.0 - x))
+    owner_payoffs = owners.U - x * owners.C_p - q * loss
+    adversary_gain = G * (x * owners.gamma + (1.0 - x)) - C_a
+    return {
+        "protect": x,
+        "attack": q,
+        "owner_payoffs": owner_payoffs,
+        "fraction_protecting": float(x.mean()),
+        "expected_attacks": float(q.sum()),
+        "attack_spend": float(C_a * q.sum()),
+        "adversary_payoff": float((q * adversary_gain).sum()),
+        "budget_price": price,
+    }
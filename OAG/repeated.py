@@ -0,0 +1,189 @@
+import numpy as np
+from player import OwnerAction, AdversaryAction
+
+# repeated OAG: every game is played for many rounds by `runs` independent
+# owner / adversary pairs that learn as they go. all pairs of all games are
+# held in numpy arrays (index 0 = PROTECT / ATTACK, the enum values) and play
+# each round together.
+#
+# this is the OAG counterpart of CAG/learning.py and is laid out the same way on
+# purpose (an (init, step) pair per rule, expected payoffs per action, a capped
+# recording stride, converged_round), so the two engines read alike. it is a
+# separate copy because the game directories don't import each other, and it
+# differs where the games do: payoffs and equilibria come from OAGGame (which can
+# have several pure equilibria, so distance is to the nearest one), players
+# choose pure actions each round, the summary is one record per game averaged
+# over its runs, and q_learning replaces CAG's replicator rule.
+#
+# learning rules
+# - fictitious_play:       each player best responds to the empirical frequency of the other's past actions
+# - best_response_inertia: each player keeps its last action with probability inertia, otherwise best responds to the other's last action
+# - q_learning:            each player keeps a value per action, updated from its payoffs, and plays
+#                          the best one (a random one with probability epsilon * epsilon_decay ** round)
+RULES = ["fictitious_play", "best_response_inertia", "q_learning"]
+
+# one record per game returned by run_repeated. mixed_protect / mixed_attack come
+# from OAGGame.mixed_equilibrium (NaN if it has none in [0, 1]); avg_protect /
+# avg_attack are the per-run time averages of play, averaged over runs; distance
+# is their mean distance to the nearest equilibrium of the game, converged the
+# fraction of runs that ended within tol of one and converged_round the median
+# round after which those runs stayed within tol (-1 if none did)
+SUMMARY_DTYPE = [
+    ("game", "i4"),
+    ("mixed_protect", "f8"),
+    ("mixed_attack", "f8"),
+    ("num_pure", "i1"),
+    ("avg_protect", "f8"),
+    ("avg_attack", "f8"),
+    ("distance", "f8"),
+    ("converged", "f8"),
+    ("converged_round", "i8"),
+]
+
+# every equilibrium (protect prob, attack prob) of each game: its pure equilibria
+# and the mixed one when it lies in [0, 1], padded with NaN to the same length
+def _equilibria(games):
+    equilibria = np.full((len(games), 5, 2), np.nan)
+    mixed = np.full((len(games), 2), np.nan)
+    num_pure = np.zeros(len(games), dtype=np.int8)
+    for g, game in enumerate(games):
+        pure = game.pure_equilibria()
+        num_pure[g] = len(pure)
+        for k, (o_act, a_act) in enumerate(pure):
+            equilibria[g, k] = (o_act == OwnerAction.PROTECT, a_act == AdversaryAction.ATTACK)
+
+        eq = game.mixed_equilibrium()
+        if eq is not None:
+            p, q = eq["Probability Owner Protects"], eq["Probability Adversary Attacks"]
+            if 0.0 <= p <= 1.0 and 0.0 <= q <= 1.0:
+                mixed[g] = p, q
+                equilibria[g, 4] = p, q
+    return equilibria, mixed, num_pure
+
+# expected payoff of each own action against the other player's probability of
+# playing action 0: owner [PROTECT, DEFECT] vs attack prob, adversary [ATTACK, ABSTAIN] vs protect prob
+def _action_payoffs(owner, adversary, attack, protect):
+    owner_payoffs = owner[:, :, 0] * attack[:, None] + owner[:, :, 1] * (1.0 - attack[:, None])
+    adv_payoffs = adversary[:, 0, :] * protect[:, None] + adversary[:, 1, :] * (1.0 - protect[:, None])
+    return owner_payoffs, adv_payoffs
+
+# each rule as (init, step): step returns this round's actions (True = PROTECT / ATTACK)
+
+def _fictitious_play_init(n, rng, options):
+    # each player starts from a random belief about the other, counted as one observed round
+    return {"belief_attack": rng.random(n), "belief_protect": rng.random(n), "count": 1}
+
+def _fictitious_play_step(state, owner, adversary, rng, options):
+    owner_payoffs, adv_payoffs = _action_payoffs(owner, adversary, state["belief_attack"], state["belief_protect"])
+    protect = owner_payoffs[:, 0] >= owner_payoffs[:, 1]
+    attack = adv_payoffs[:, 0] >= adv_payoffs[:, 1]
+
+    state["count"] += 1
+    state["belief_attack"] += (attack - state["belief_attack"]) / state["count"]
+    state["belief_protect"] += (protect - state["belief_protect"]) / state["count"]
+    return protect, attack
+
+def _inertia_init(n, rng, options):
+    return {"protect": rng.random(n) < 0.5, "attack": rng.random(n) < 0.5}
+
+def _inertia_step(state, owner, adversary, rng, options):
+    owner_payoffs, adv_payoffs = _action_payoffs(owner, adversary, state["attack"].astype(float),
+                                                 state["protect"].astype(float))
+    best_protect = owner_payoffs[:, 0] >= owner_payoffs[:, 1]
+    best_attack = adv_payoffs[:, 0] >= adv_payoffs[:, 1]
+
+    n = len(best_protect)
+    protect = np.where(rng.random(n) < options["inertia"], state["protect"], best_protect)
+    attack = np.where(rng.random(n) < options["inertia"], state["attack"], best_attack)
+    state["protect"], state["attack"] = protect, attack
+    return protect, attack
+
+def _q_learning_init(n, rng, options):
+    return {"owner_values": np.zeros((n, 2)), "adv_values": np.zeros((n, 2)), "epsilon": options["epsilon"]}
+
+def _q_learning_step(state, owner, adversary, rng, options):
+    n = len(owner)
+    rows = np.arange(n)
+
+    # epsilon-greedy choice, ties broken at random
+    def choose(values):
+        greedy = np.where(values[:, 0] == values[:, 1], rng.random(n) < 0.5, values[:, 0] > values[:, 1])
+        return np.where(rng.random(n) < state["epsilon"], rng.random(n) < 0.5, greedy)
+
+    protect = choose(state["owner_values"])
+    attack = choose(state["adv_values"])
+    o, a = np.where(protect, 0, 1), np.where(attack, 0, 1)
+
+    rate = options["learning_rate"]
+    state["owner_values"][rows, o] += rate * (owner[rows, o, a] - state["owner_values"][rows, o])
+    state["adv_values"][rows, a] += rate * (adversary[rows, o, a] - state["adv_values"][rows, a])
+    state["epsilon"] *= options["epsilon_decay"]
+    return protect, attack
+
+_RULES = {
+    "fictitious_play": (_fictitious_play_init, _fictitious_play_step),
+    "best_response_inertia": (_inertia_init, _inertia_step),
+    "q_learning": (_q_learning_init, _q_learning_step),
+}
+
+# plays every OAGGame in games for `rounds` rounds with `runs` independent pairs
+# each, learning with the given rule. payoffs come from each game's payoff table.
+# the fraction of runs protecting / attacking is recorded per game every stride
+# rounds, where stride is record_every raised to ceil(rounds / max_records) when
+# needed, so at most max_records rows are kept however many rounds are played
+# (row i is round (i + 1) * stride). with path set they are saved together with
+# the summary and the stride to a compressed .npz file.
+# returns (summary, frequencies): a SUMMARY_DTYPE record per game and a
+# (rounds // stride, len(games), 2) float32 array
+def run_repeated(games, rule="fictitious_play", runs=100, rounds=10_000, seed=None, tol=0.05,
+                 inertia=0.5, epsilon=0.1, epsilon_decay=0.999, learning_rate=0.1,
+                 record_every=1, max_records=10_000, path=None):
+    if rule not in _RULES:
+        raise ValueError(f"Unknown learning rule '{rule}'")
+    init, step = _RULES[rule]
+    options = {"inertia": inertia, "epsilon": epsilon, "epsilon_decay": epsilon_decay, "learning_rate": learning_rate}
+
+    # payoff tables [game, owner action, adversary action, player], one row per run
+    tables = np.array([game.payoff_table() for game in games], dtype=float)
+    owner = np.repeat(tables[..., 0], runs, axis=0)
+    adversary = np.repeat(tables[..., 1], runs, axis=0)
+    equilibria, mixed, num_pure = _equilibria(games)
+    run_equilibria = np.repeat(equilibria, runs, axis=0)
+
+    n = len(owner)
+    rng = np.random.default_rng(seed)
+    state = init(n, rng, options)
+    stride = max(record_every, -(-rounds // max_records))
+    frequencies = np.empty((rounds // stride, len(games), 2), dtype=np.float32)
+    totals = np.zeros((n, 2))
+    last_outside = np.full(n, -1, dtype=np.int64)
+    distance = np.full(n, np.nan)
+    for t in range(rounds):
+        protect, attack = step(state, owner, adversary, rng, options)
+        if (t + 1) % stride == 0:
+            frequencies[t // stride, :, 0] = protect.reshape(len(games), runs).mean(axis=1)
+            frequencies[t // stride, :, 1] = attack.reshape(len(games), runs).mean(axis=1)
+
+        totals[:, 0] += protect
+        totals[:, 1] += attack
+        averages = totals / (t + 1)
+        distance = np.nanmin(np.linalg.norm(run_equilibria - averages[:, None, :], axis=2), axis=1)
+        last_outside[~(distance <= tol)] = t
+
+    summary = np.empty(len(games), dtype=SUMMARY_DTYPE)
+    summary["game"] = np.arange(len(games))
+    summary["mixed_protect"], summary["mixed_attack"] = mixed[:, 0], mixed[:, 1]
+    summary["num_pure"] = num_pure
+    converged_round = np.where(last_outside < rounds - 1, last_outside + 1, -1).reshape(len(games), runs)
+    for g in range(len(games)):
+        runs_slice = slice(g * runs, (g + 1) * runs)
+        summary["avg_protect"][g], summary["avg_attack"][g] = (totals[runs_slice] / max(rounds, 1)).mean(axis=0)
+        summary["distance"][g] = distance[runs_slice].mean()
+        done = converged_round[g][converged_round[g] >= 0]
+        summary["converged"][g] = len(done) / runs
+        summary["converged_round"][g] = int(np.median(done)) if len(done) else -1
+
+    if path is not None:
+        np.savez_compressed(path, frequencies=frequencies, summary=summary, rule=np.array(rule),
+                            stride=np.array(stride))
+    return summary, frequencies
@@ -1,5 +1,6 @@
+import numpy as np
 from OAGgame import OAGGame
-from player import Owner, Adversary
+from player import Owner, Adversary, OwnerAction, AdversaryAction
 
 def sweep_Cp_Ca(U, P, G, gamma, Cp_vals, Ca_vals):
     results = []
@@ -22,3 +23,92 @@ def sweep_Cp_Ca(U, P, G, gamma, Cp_vals, Ca_vals):
             results.append((C_p, C_a, label))
 
     return results
+
+# labels used by the grid sweep, in the order of the label index stored per cell.
+# the first four are the single pure equilibria (index = owner.value * 2 + adversary.value)
+LABELS = [f"{o.name}_{a.name}" for o in OwnerAction for a in AdversaryAction] + ["no_pure_eq", "multiple"]
+NO_PURE_EQ = LABELS.index("no_pure_eq")
+MULTIPLE = LABELS.index("multiple")
+
+# max number of cells classified per numpy pass
+GRID_CHUNK = 1 << 20
+
+# one record per cell of sweep_Cp_Ca_grid
+GRID_DTYPE = [
+    ("C_p", "f8"),
+    ("C_a", "f8"),
+    ("label", "i1"),
+    ("pure_profiles", "u1"),
+    ("p_protect", "f8"),
+    ("q_attack", "f8"),
+]
+
+# all four payoff cells and the equilibria for arrays of parameters at once.
+# the arguments broadcast together; returns the label index, a bitmask of the
+# pure equilibria (bit owner.value * 2 + adversary.value) and the mixed
+# equilibrium probabilities from the same formulas as OAGGame.mixed_equilibrium,
+# NaN where it has none or they fall outside [0, 1]
+def classify_arrays(U, P, C_p, gamma, G, C_a):
+    U, P, C_p, gamma, G, C_a = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (U, P, C_p, gamma, G, C_a)))
+
+    # owner / adversary payoffs, same expressions as OAGGame.payoff
+    owner_pa, adv_pa = U - C_p - gamma * P, gamma * G - C_a
+    owner_pb = U - C_p
+    owner_da, adv_da = U - P, G - C_a
+    owner_db = U
+
+    # each profile is an equilibrium when neither player gains by deviating
+    pure = ((owner_pa >= owner_da) & (adv_pa >= 0)).astype(np.uint8)
+    pure |= ((owner_pb >= owner_db) & (0 >= adv_pa)).astype(np.uint8) << 1
+    pure |= ((owner_da >= owner_pa) & (adv_da >= 0)).astype(np.uint8) << 2
+    pure |= ((owner_db >= owner_pb) & (0 >= adv_da)).astype(np.uint8) << 3
+
+    count = np.zeros(pure.shape, dtype=np.uint8)
+    for bit in range(4):
+        count += (pure >> bit) & 1
+    single = np.log2(np.maximum(pure, 1)).astype(np.int8)
+    label = np.where(count == 0, NO_PURE_EQ, np.where(count > 1, MULTIPLE, single))
+
+    denom_q = owner_pa - owner_pb - owner_da + owner_db
+    denom_p = adv_da - adv_pa
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = np.where(np.abs(denom_q) < 1e-8, np.nan, (owner_db - owner_pb) / denom_q)
+        p = np.where(np.abs(denom_p) < 1e-8, np.nan, adv_da / denom_p)
+    valid = (p >= 0) & (p <= 1) & (q >= 0) & (q <= 1)
+
+    return {
+        "label": label.astype(np.int8),
+        "pure_profiles": pure,
+        "p_protect": np.where(valid, p, np.nan),
+        "q_attack": np.where(valid, q, np.nan),
+    }
+
+# array version of sweep_Cp_Ca: classifies every (C_p, C_a) cell of the grid at
+# once instead of building an OAGGame per cell. U, P, G and gamma may be scalars
+# or arrays that broadcast against the (len(Cp_vals), len(Ca_vals)) grid.
+# returns a structured array of that shape with C_p, C_a, the label index into
+# LABELS, the pure equilibrium bitmask and the mixed probabilities
+def sweep_Cp_Ca_grid(U, P, G, gamma, Cp_vals, Ca_vals):
+    Cp_vals = np.asarray(Cp_vals, dtype=float)
+    Ca_vals = np.asarray(Ca_vals, dtype=float)
+    shape = (len(Cp_vals), len(Ca_vals))
+    U, P, G, gamma = (np.broadcast_to(np.asarray(v, dtype=float), shape) for v in (U, P, G, gamma))
+
+    grid = np.empty(shape, dtype=GRID_DTYPE)
+    rows = max(1, GRID_CHUNK // max(len(Ca_vals), 1))
+    for start in range(0, len(Cp_vals), rows):
+        stop = min(start + rows, len(Cp_vals))
+        C_p = Cp_vals[start:stop, None]
+        cells = classify_arrays(U[start:stop], P[start:stop], C_p, gamma[start:stop], G[start:stop], Ca_vals[None, :])
+
+        chunk = grid[start:stop]
+        chunk["C_p"] = C_p
+        chunk["C_a"] = Ca_vals[None, :]
+        for name, values in cells.items():
+            chunk[name] = values
+    return grid
+
+# label names of a sweep_Cp_Ca_grid result, as strings like sweep_Cp_Ca returns
+def grid_labels(grid):
+    return np.array(LABELS)[grid["label"]]
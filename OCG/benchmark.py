@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from players import generate_passengers_2d, generate_taxis_2d
+from matching import match_fleet, LinearScanIndex
+
+# throughput of multi-taxi matching as the fleet and passenger pool grow.
+# the matching radius shrinks with density so each taxi sees roughly the same
+# number of nearby passengers; the linear scan baseline is skipped when too slow
+def bench_matching(sizes=(1_000, 10_000, 100_000), epsilon=1.0, nearby=30, linear_limit=10_000, seed=0):
+    rng = np.random.default_rng(seed)
+    print("Multi-taxi matching throughput (taxis matched per second):")
+    for n in sizes:
+        values, locations = generate_passengers_2d(n, rng)
+        taxis = generate_taxis_2d(n, rng)
+        area = float(np.ptp(locations[:, 0]) * np.ptp(locations[:, 1]))
+        radius = float(np.sqrt(nearby * area / (np.pi * n)))
+
+        start = time.perf_counter()
+        assigned, _ = match_fleet(taxis, values, locations, radius=radius, epsilon=epsilon, rng=rng)
+        grid_time = time.perf_counter() - start
+        line = f"  taxis=passengers={n:>7d}: grid={n / grid_time:>10.0f}/s"
+
+        if n <= linear_limit:
+            start = time.perf_counter()
+            match_fleet(taxis, values, locations, radius=radius, epsilon=epsilon, rng=rng,
+                        index=LinearScanIndex(locations))
+            linear_time = time.perf_counter() - start
+            line += f"  linear={n / linear_time:>10.0f}/s"
+
+        print(line + f"  matched={np.mean(assigned >= 0):.3f}")
+
+# wall-clock startup of OCG/main.py: `--help` (no numeric imports), a small
+# `--no-plots` sweep (numpy only), and the cost of the matplotlib import that
+# --no-plots avoids. each command is run `repeats` times and the best is kept
+def bench_startup(repeats=5):
+    here = os.path.dirname(os.path.abspath(__file__))
+    commands = {
+        "main.py --help": [sys.executable, "main.py", "--help"],
+        "main.py --no-plots --runs 100": [sys.executable, "main.py", "--no-plots", "--runs", "100"],
+        "import matplotlib.pyplot": [sys.executable, "-c", "import matplotlib.pyplot"],
+    }
+    print("OCG startup time (best of %d):" % repeats)
+    for label, cmd in commands.items():
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(cmd, cwd=here, stdout=subprocess.DEVNULL, check=True)
+            best = min(best, time.perf_counter() - start)
+        print(f"  {label:<32s} {best * 1000:8.1f} ms")
+
+BENCHMARKS = {"matching": bench_matching, "startup": bench_startup}
+
+# usage: python benchmark.py [matching] [startup]  (all benchmarks by default)
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
@@ -1,37 +1,90 @@
-from simulate import run_epsilon_sweep
-from plots import (
-    plot_accuracy_vs_epsilon,
-    plot_welfare_vs_epsilon,
-    plot_winner_histograms,
-)
-
-def main():
-    num_passengers = 3
-    epsilons = [0.01, 0.1, 0.5, 1.0, 2.0]
-    runs_per_eps = 1000
-
-    results = run_epsilon_sweep(num_passengers=num_passengers,
-                                epsilons=epsilons,
-                                runs_per_eps=runs_per_eps)
-
-    print("Accuracy of picking the true best passenger vs epsilon:")
+import argparse
+import json
+import sys
+
+# simulate.py / results.py (numpy) and plots.py (matplotlib) are imported inside
+# main() only when they are needed, so `--help` and `--no-plots` runs start fast
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Owner vs Collector game (OCG): DP taxi allocation sweep")
+    parser.add_argument("--epsilons", type=float, nargs="+", default=[0.01, 0.1, 0.5, 1.0, 2.0],
+                        help="privacy parameters to sweep")
+    parser.add_argument("--hist-epsilons", type=float, nargs="+", default=[0.01, 0.5, 2.0],
+                        help="epsilons to draw winner histograms for")
+    parser.add_argument("--passengers", type=int, default=3, help="passengers per world")
+    parser.add_argument("--runs", type=int, default=1000, help="simulated worlds per epsilon")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="random seed; seeded results are cached and reused")
+    parser.add_argument("--estimator", choices=["sample", "expected"], default="sample",
+                        help="sample one DP winner per world, or use the exact expected values")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table",
+                        help="how to print the results")
+    parser.add_argument("--no-plots", action="store_true", help="only print the results")
+    parser.add_argument("--output-dir", default=None,
+                        help="write the plots here (headless) instead of showing them")
+    parser.add_argument("--plot-formats", nargs="+", default=["png", "svg"],
+                        help="file formats used with --output-dir")
+    return parser.parse_args(argv)
+
+def print_results(results, fmt, out=sys.stdout):
+    if fmt == "json":
+        json.dump({str(eps): stats for eps, stats in results.items()}, out, indent=2)
+        out.write("\n")
+        return
+
+    if fmt == "csv":
+        keys = [k for k in next(iter(results.values())) if not k.endswith("_ci")]
+        out.write(",".join(["epsilon"] + keys) + "\n")
+        for eps, stats in results.items():
+            out.write(",".join([str(eps)] + [str(stats[k]) for k in keys]) + "\n")
+        return
+
+    print("Accuracy of picking the true best passenger vs epsilon:", file=out)
     for eps, stats in results.items():
         print(
             f"  epsilon={eps:.2f}: "
             f"accuracy={stats['accuracy']:.3f}, "
             f"avg_dp_welfare={stats['avg_dp_welfare']:.3f}, "
-            f"avg_true_best_welfare={stats['avg_true_best_welfare']:.3f}"
+            f"avg_true_best_welfare={stats['avg_true_best_welfare']:.3f}",
+            file=out,
         )
 
+def main(argv=None):
+    args = parse_args(argv)
+    hist_epsilons = args.hist_epsilons
+
+    from results import load_or_simulate
+
+    # the worlds are simulated once and shared by the sweep and the histograms
+    results, winner_counts = load_or_simulate(num_passengers=args.passengers,
+                                              epsilons=args.epsilons,
+                                              hist_epsilons=hist_epsilons,
+                                              runs_per_eps=args.runs,
+                                              seed=args.seed,
+                                              estimator=args.estimator)
+    print_results(results, args.format)
+
+    if args.no_plots:
+        return
+
     # Plots for the report
+    from plots import (
+        plot_accuracy_vs_epsilon,
+        plot_welfare_vs_epsilon,
+        plot_winner_histograms,
+        render_plots,
+    )
+
+    if args.output_dir is not None:
+        render_plots(results, winner_counts, args.output_dir, args.plot_formats)
+        return
+
     plot_accuracy_vs_epsilon(results)
     plot_welfare_vs_epsilon(results)
-
-    # Histograms for a subset of epsilons (you can adjust this list)
-    hist_epsilons = [0.01, 0.5, 2.0]
-    plot_winner_histograms(num_passengers=num_passengers,
+    plot_winner_histograms(num_passengers=args.passengers,
                            epsilons=hist_epsilons,
-                           runs_per_eps=runs_per_eps)
+                           runs_per_eps=args.runs,
+                           winner_counts=winner_counts)
 
 if __name__ == "__main__":
     main()
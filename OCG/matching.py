@@ -0,0 +1,94 @@
+import numpy as np
+from mechanisms import vcg_auction_batch, ExponentialSampler
+
+# uniform grid spatial index over 2-D points. points are bucketed by cell and
+# stored sorted by cell id, so the points of one row of cells are a contiguous
+# slice and a radius query only touches the cells overlapping its bounding box
+class GridIndex:
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if len(self.points) == 0:
+            self.cell_size = cell_size
+            self.origin = np.zeros(2)
+            self.shape = np.zeros(2, dtype=np.int64)
+            self.order = np.empty(0, dtype=np.int64)
+            self.starts = np.zeros(1, dtype=np.int64)
+            return
+
+        # cells no smaller than extent / sqrt(n), so the grid never has much more
+        # than n cells however small the query radius is
+        self.origin = self.points.min(axis=0)
+        extent = float((self.points.max(axis=0) - self.origin).max())
+        self.cell_size = max(cell_size, extent / np.sqrt(len(self.points))) or 1.0
+
+        cells = np.floor((self.points - self.origin) / self.cell_size).astype(np.int64)
+        self.shape = cells.max(axis=0) + 1
+        keys = cells[:, 0] * self.shape[1] + cells[:, 1]
+        self.order = np.argsort(keys, kind="stable")
+
+        # starts[k] is the position in self.order of the first point in cell k
+        self.starts = np.searchsorted(keys[self.order], np.arange(self.shape[0] * self.shape[1] + 1))
+
+    # indices and distances of all points within radius of center
+    def query(self, center, radius):
+        lo = np.floor((center - radius - self.origin) / self.cell_size).astype(np.int64)
+        hi = np.floor((center + radius - self.origin) / self.cell_size).astype(np.int64)
+        lo = np.maximum(lo, 0)
+        hi = np.minimum(hi, self.shape - 1)
+        if (lo > hi).any():
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        chunks = []
+        for cx in range(lo[0], hi[0] + 1):
+            row = cx * self.shape[1]
+            chunks.append(self.order[self.starts[row + lo[1]]:self.starts[row + hi[1] + 1]])
+        candidates = np.concatenate(chunks)
+
+        distances = np.linalg.norm(self.points[candidates] - center, axis=1)
+        near = distances <= radius
+        return candidates[near], distances[near]
+
+# baseline "index" that scans every point on each query, for comparison
+class LinearScanIndex:
+    def __init__(self, points):
+        self.points = np.asarray(points, dtype=float)
+
+    def query(self, center, radius):
+        distances = np.linalg.norm(self.points - center, axis=1)
+        near = np.flatnonzero(distances <= radius)
+        return near, distances[near]
+
+# matches a fleet of taxis to passengers on the plane. taxis are served in order
+# and each one runs its own selection over the still unmatched passengers within
+# radius, scoring them as value - distance: epsilon=None runs the VCG auction
+# (vcg_auction_batch), otherwise the exponential DP mechanism (ExponentialSampler).
+# returns the passenger index per taxi (-1 if none nearby) and the score of that match
+def match_fleet(taxi_locations, values, locations, radius=1.0, epsilon=None, rng=None, index=None):
+    if index is None:
+        index = GridIndex(locations, radius)
+    if epsilon is not None and rng is None:
+        rng = np.random.default_rng()
+
+    assigned = np.full(len(taxi_locations), -1, dtype=np.int64)
+    assigned_scores = np.full(len(taxi_locations), np.nan)
+    taken = np.zeros(len(values), dtype=bool)
+
+    for t, taxi in enumerate(taxi_locations):
+        candidates, distances = index.query(taxi, radius)
+        free = ~taken[candidates]
+        candidates, distances = candidates[free], distances[free]
+        if len(candidates) == 0:
+            continue
+
+        scores = values[candidates] - distances
+        if epsilon is None:
+            winners, _, _ = vcg_auction_batch(scores[None, :], distances[None, :])
+            k = int(winners[0, 0])
+        else:
+            k = ExponentialSampler(scores, epsilon).sample(rng)
+
+        assigned[t] = candidates[k]
+        assigned_scores[t] = scores[k]
+        taken[candidates[k]] = True
+
+    return assigned, assigned_scores
@@ -1,29 +1,120 @@
+import heapq
 import math
 import random
+from bisect import bisect_left
+from itertools import accumulate
+import numpy as np
+from players import PassengerBatch
 
-# classic VCG winner selection
+# classic VCG winner selection (passengers can be a list or a PassengerBatch)
 def vcg_winner(game, passengers):
+    if isinstance(passengers, PassengerBatch):
+        return passengers[int(np.argmax(game.scores(passengers)))]
     scores = [(p, game.score(p)) for p in passengers]
     winner, _ = max(scores, key=lambda x: x[1])
     return winner
 
+# VCG auction for k identical units (k=1 is the single taxi case). the k highest
+# scores win and each winner pays the Clarke pivot payment, the welfare the others
+# lose because of them: the (k+1)-th highest score (0 if nobody is left out) plus
+# the winner's own distance cost, which the collector pays when serving them.
+# uses a top-(k+1) heap selection instead of re-running the auction per winner.
+# returns the winners (highest score first) and their payments
+def vcg_auction(game, passengers, k=1):
+    scores = game.scores(passengers)
+    top = heapq.nlargest(k + 1, range(len(scores)), key=scores.__getitem__)
+    threshold = scores[top[k]] if len(top) > k else 0.0
+
+    winners = [passengers[i] for i in top[:k]]
+    payments = [threshold + game.distance_cost(p) for p in winners]
+    return winners, payments
+
+# batched VCG auction over (runs, n) score and distance cost arrays. returns the
+# winner ids (runs, k) ordered by score, their payments (runs, k) and the
+# (k+1)-th highest score of each world (runs,), which is the collector's
+# revenue per unit once the distance cost is paid
+def vcg_auction_batch(scores, distance_costs, k=1):
+    runs, n = scores.shape
+    rows = np.arange(runs)[:, None]
+    k = min(k, n)
+
+    if n > k:
+        top = np.argpartition(-scores, k, axis=1)[:, :k + 1]
+        thresholds = scores[rows[:, 0], top[:, k]]
+        winners = top[:, :k]
+    else:
+        thresholds = np.zeros(runs)
+        winners = np.tile(np.arange(n), (runs, 1))
+
+    # order each world's winners from highest to lowest score
+    order = np.argsort(-scores[rows, winners], axis=1, kind="stable")
+    winners = winners[rows, order]
+    payments = thresholds[:, None] + distance_costs[rows, winners]
+    return winners, payments, thresholds
+
+# exponential mechanism over one fixed score vector. the weights are shifted by
+# the max score (log-sum-exp) so exp never overflows, and the prefix sums let
+# repeated draws from the same scores be done with a bisect in O(log n).
+# numpy score arrays are handled with numpy, plain lists in pure python
+class ExponentialSampler:
+    def __init__(self, scores, epsilon):
+        if isinstance(scores, np.ndarray):
+            self.log_weights = epsilon * (scores - scores.max())
+            self.cumulative = np.cumsum(np.exp(self.log_weights))
+            self.total = float(self.cumulative[-1])
+            return
+
+        top = max(scores)
+        self.log_weights = [epsilon * (s - top) for s in scores]
+        self.cumulative = list(accumulate(math.exp(w) for w in self.log_weights))
+        self.total = self.cumulative[-1]
+
+    # index of the sampled winner: first index with r <= cumulative weight
+    def sample(self, rng=random):
+        r = rng.random() * self.total
+        if isinstance(self.cumulative, np.ndarray):
+            return min(int(np.searchsorted(self.cumulative, r)), len(self.cumulative) - 1)
+        return min(bisect_left(self.cumulative, r), len(self.cumulative) - 1)
+
+    # selection probabilities, only built when asked for
+    def probs(self):
+        if isinstance(self.log_weights, np.ndarray):
+            return np.exp(self.log_weights) / self.total
+        return [math.exp(w) / self.total for w in self.log_weights]
+
 # winner using exponential DP mechanism. returns winner and the probabilites used
 def exponential_dp_winner(game, passengers, epsilon):
-    scores = [game.score(p) for p in passengers]
-
-    # compute weights
-    weights = [math.exp(epsilon * s) for s in scores]
-    total = sum(weights)
-    probs = [w / total for w in weights]
-
-    # sample from categorical distribution
-    r = random.random()
-    collective = 0.0
-    for p, prob in zip(passengers, probs):
-        collective += prob
-        if r <= collective:
-            # print(f"Selected passenger {p.id} with probability {prob:.4f} out of {probs}")
-            return p, probs
-
-    # fallback (due to tiny rounding errors)
-    return passengers[-1], probs
+    sampler = ExponentialSampler(game.scores(passengers), epsilon)
+    return passengers[sampler.sample()], sampler.probs()
+
+# winner only, using the Gumbel-max trick: argmax of epsilon * score + Gumbel noise
+# has the same distribution as the exponential mechanism, in one pass with no lists
+def exponential_dp_sample(game, passengers, epsilon, rng=random):
+    best, best_key = None, -math.inf
+    for p in passengers:
+        u = rng.random()
+        while u == 0.0:
+            u = rng.random()
+        key = epsilon * game.score(p) - math.log(-math.log(u))
+        if key > best_key:
+            best, best_key = p, key
+    return best
+
+# batched exponential DP selection probabilities (row-wise softmax of epsilon * score)
+def exponential_dp_probs(scores, epsilon):
+    weights = np.exp(epsilon * (scores - scores.max(axis=1, keepdims=True)))
+    return weights / weights.sum(axis=1, keepdims=True)
+
+# batched exponential DP mechanism: one winner index per row of scores.
+# draws are the per-row uniforms; pass them in to reuse the same ones across epsilons
+def exponential_dp_winners(scores, epsilon, rng=None, draws=None):
+    # shift by the row max before exponentiating so large scores don't overflow
+    weights = np.exp(epsilon * (scores - scores.max(axis=1, keepdims=True)))
+    cumulative = np.cumsum(weights, axis=1)
+
+    # same inverse-cdf rule as the scalar version: first index with r <= cumulative
+    if draws is None:
+        draws = rng.random(len(scores))
+    r = draws[:, None] * cumulative[:, -1:]
+    winners = (cumulative < r).sum(axis=1)
+    return np.minimum(winners, scores.shape[1] - 1)
@@ -1,5 +1,10 @@
 from dataclasses import dataclass
 import random
+import numpy as np
+
+# ranges the random passengers' values and locations are drawn from
+VALUE_RANGE = (5, 15)
+LOCATION_RANGE = (0, 10)
 
 # passengers are the data owners
 @dataclass
@@ -8,6 +13,55 @@ class Passenger:
     value: float
     location: float
 
+# columnar passenger population: ids, values and locations stored as contiguous
+# numpy arrays instead of one dataclass per passenger. indexing or iterating
+# gives PassengerView objects, so code written against Passenger still works
+class PassengerBatch:
+    __slots__ = ("ids", "values", "locations")
+
+    def __init__(self, ids, values, locations):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.values = np.asarray(values, dtype=float)
+        self.locations = np.asarray(locations, dtype=float)
+
+    @classmethod
+    def from_passengers(cls, passengers):
+        return cls([p.id for p in passengers],
+                   [p.value for p in passengers],
+                   [p.location for p in passengers])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return PassengerView(self, i)
+
+    def __iter__(self):
+        return (PassengerView(self, i) for i in range(len(self.ids)))
+
+# read-only view of one passenger in a PassengerBatch (same fields as Passenger)
+class PassengerView:
+    __slots__ = ("batch", "index")
+
+    def __init__(self, batch, index):
+        self.batch = batch
+        self.index = index
+
+    @property
+    def id(self):
+        return int(self.batch.ids[self.index])
+
+    @property
+    def value(self):
+        return float(self.batch.values[self.index])
+
+    @property
+    def location(self):
+        return float(self.batch.locations[self.index])
+
+    def __repr__(self):
+        return f"PassengerView(id={self.id}, value={self.value}, location={self.location})"
+
 # the taxi service is the data collector
 class TaxiService:
     def __init__(self, taxi_location=0.0):
@@ -22,11 +76,56 @@ class TaxiService:
         """Welfare / quality function: value - distance cost."""
         return p.value - self.distance_cost(p)
 
+    # distance costs for whole arrays of passenger locations
+    def distance_cost_arrays(self, locations):
+        return np.abs(locations - self.taxi_location)
+
+    # same score as above for whole arrays of passengers (one row per world)
+    def score_arrays(self, values, locations):
+        return values - self.distance_cost_arrays(locations)
+
+    # scores of all passengers: a numpy array for a PassengerBatch, otherwise a list
+    def scores(self, passengers):
+        if isinstance(passengers, PassengerBatch):
+            return self.score_arrays(passengers.values, passengers.locations)
+        return [self.score(p) for p in passengers]
+
 # generates random passengers in an array
 def generate_random_passengers(n):
     passengers = []
     for i in range(n):
-        value = random.uniform(5, 15)
-        location = random.uniform(0, 10)
+        value = random.uniform(*VALUE_RANGE)
+        location = random.uniform(*LOCATION_RANGE)
         passengers.append(Passenger(i, value, location))
     return passengers
+
+# n passengers stored column-wise in a PassengerBatch, with every field drawn in
+# one vectorized rng.uniform call. without an rng one is seeded from the random
+# module, so random.seed still makes runs reproducible. match_random=True instead
+# draws the exact same passengers as generate_random_passengers (one random.uniform
+# per field, same order), which is slower and only meant for equivalence checks
+def generate_passenger_batch(n, rng=None, match_random=False):
+    if match_random:
+        draws = np.array([random.uniform(*r) for _ in range(n) for r in (VALUE_RANGE, LOCATION_RANGE)])
+        draws = draws.reshape(n, 2)
+        return PassengerBatch(np.arange(n), draws[:, 0], draws[:, 1])
+
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    return PassengerBatch(np.arange(n), rng.uniform(*VALUE_RANGE, size=n), rng.uniform(*LOCATION_RANGE, size=n))
+
+# generates passengers for many worlds at once as (runs, n) value and location arrays
+def generate_passenger_arrays(runs, n, rng):
+    values = rng.uniform(*VALUE_RANGE, size=(runs, n))
+    locations = rng.uniform(*LOCATION_RANGE, size=(runs, n))
+    return values, locations
+
+# generates n passengers on a 2-D plane: values (n,) and (x, y) locations (n, 2)
+def generate_passengers_2d(n, rng):
+    values = rng.uniform(*VALUE_RANGE, size=n)
+    locations = rng.uniform(*LOCATION_RANGE, size=(n, 2))
+    return values, locations
+
+# generates (x, y) locations (m, 2) for a fleet of m taxis on the same plane
+def generate_taxis_2d(m, rng):
+    return rng.uniform(*LOCATION_RANGE, size=(m, 2))
@@ -1,36 +1,49 @@
+import os
 import matplotlib.pyplot as plt
-from simulate import sample_dp_winners
+from simulate import count_dp_winners
 
-def plot_accuracy_vs_epsilon(results):
+# default folder for the report figures
+PLOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "plots")
+
+# every plot is shown interactively by default, or written to output_dir
+# (one file per format, e.g. png and svg) without opening a window
+def plot_accuracy_vs_epsilon(results, output_dir=None, formats=("png",)):
     epsilons = sorted(results.keys())
     accuracies = [results[eps]["accuracy"] for eps in epsilons]
 
     plt.figure(figsize=(7, 5))
-    plt.plot(epsilons, accuracies, marker="o")
+    plt.errorbar(epsilons, accuracies, yerr=_error_bars(results, epsilons, "accuracy"),
+                 marker="o", capsize=3)
     plt.xlabel("Privacy Parameter ε")
     plt.ylabel("Accuracy (P(DP winner = true best))")
     plt.title("Effect of ε on Allocation Accuracy")
     plt.grid(True)
     plt.tight_layout()
-    plt.show()
+    _finish("EffectOfEpsilon", output_dir, formats)
 
-def plot_welfare_vs_epsilon(results):
+def plot_welfare_vs_epsilon(results, output_dir=None, formats=("png",)):
     epsilons = sorted(results.keys())
     dp_welfare = [results[eps]["avg_dp_welfare"] for eps in epsilons]
     optimal_welfare = [results[eps]["avg_true_best_welfare"] for eps in epsilons]
 
     plt.figure(figsize=(7, 5))
-    plt.plot(epsilons, optimal_welfare, marker="o", label="Optimal welfare (true best)")
-    plt.plot(epsilons, dp_welfare, marker="o", label="DP mechanism welfare")
+    plt.errorbar(epsilons, optimal_welfare, yerr=_error_bars(results, epsilons, "avg_true_best_welfare"),
+                 marker="o", capsize=3, label="Optimal welfare (true best)")
+    plt.errorbar(epsilons, dp_welfare, yerr=_error_bars(results, epsilons, "avg_dp_welfare"),
+                 marker="o", capsize=3, label="DP mechanism welfare")
     plt.xlabel("Privacy Parameter ε")
     plt.ylabel("Expected Welfare (score)")
     plt.title("Welfare vs. Privacy Level ε")
     plt.legend()
     plt.grid(True)
     plt.tight_layout()
-    plt.show()
+    _finish("welfarevsprivacy", output_dir, formats)
 
-def plot_winner_histograms(num_passengers, epsilons, runs_per_eps):
+# pass a WorldBatch from simulate_worlds to reuse its worlds, or winner_counts
+# (epsilon -> counts per passenger id, e.g. loaded from a results file)
+# instead of re-simulating
+def plot_winner_histograms(num_passengers, epsilons, runs_per_eps, worlds=None, winner_counts=None,
+                           output_dir=None, formats=("png",)):
     num_eps = len(epsilons)
     fig, axes = plt.subplots(1, num_eps, figsize=(4 * num_eps, 4), sharey=True)
 
@@ -39,12 +52,43 @@ def plot_winner_histograms(num_passengers, epsilons, runs_per_eps):
         axes = [axes]
 
     for ax, eps in zip(axes, epsilons):
-        winners = sample_dp_winners(num_passengers, eps, runs_per_eps)
-        ax.hist(winners, bins='auto', rwidth=0.8)
+        if winner_counts is not None:
+            counts = winner_counts[eps]
+        elif worlds is not None:
+            counts = worlds.dp_winner_counts(eps).counts
+        else:
+            counts = count_dp_winners(num_passengers, eps, runs_per_eps).counts
+        ax.bar(range(len(counts)), counts, width=0.8)
+        ax.set_xticks(range(len(counts)))
         ax.set_title(f"ε = {eps}")
         ax.set_xlabel("Winner passenger ID")
         ax.set_ylabel("Count")
 
     plt.suptitle("Distribution of DP Winners for Different ε")
     plt.tight_layout()
-    plt.show()
+    _finish("distributionfordifferentep", output_dir, formats)
+
+# writes every report figure to output_dir without a display (for batch jobs)
+def render_plots(results, winner_counts, output_dir=PLOTS_DIR, formats=("png", "svg")):
+    plt.switch_backend("Agg")
+    plot_accuracy_vs_epsilon(results, output_dir, formats)
+    plot_welfare_vs_epsilon(results, output_dir, formats)
+    num_passengers = len(next(iter(winner_counts.values())))
+    plot_winner_histograms(num_passengers, list(winner_counts), runs_per_eps=None,
+                           winner_counts=winner_counts, output_dir=output_dir, formats=formats)
+
+# shows the current figure, or saves it as output_dir/name.<format> and closes it
+def _finish(name, output_dir, formats):
+    if output_dir is None:
+        plt.show()
+        return
+    os.makedirs(output_dir, exist_ok=True)
+    for fmt in formats:
+        plt.savefig(os.path.join(output_dir, f"{name}.{fmt}"))
+    plt.close()
+
+# half widths of the confidence intervals stored by the sweep, None if there are none
+def _error_bars(results, epsilons, key):
+    if any(f"{key}_ci" not in results[eps] for eps in epsilons):
+        return None
+    return [(results[eps][f"{key}_ci"][1] - results[eps][f"{key}_ci"][0]) / 2 for eps in epsilons]
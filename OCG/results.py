@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import numpy as np
+from simulate import simulate_world_chunks, run_shared_sweep
+
+# where persisted sweep results are written (one compressed .npz per cache key)
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# bump when the simulation changes in a way that makes old results stale
+CACHE_VERSION = 2
+
+# stable hash of everything that determines the results (parameters + seed)
+def cache_key(params):
+    blob = json.dumps({"version": CACHE_VERSION, **params}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+def results_path(params, results_dir=RESULTS_DIR):
+    return os.path.join(results_dir, f"ocg-{cache_key(params)}.npz")
+
+# writes the sweep results (epsilon -> stats dict) and the winner counts
+# (epsilon -> counts per passenger id) to a compressed .npz file
+def save_results(path, params, results, winner_counts):
+    epsilons = list(results)
+    arrays = {
+        "params": np.array(json.dumps(params, sort_keys=True)),
+        "epsilons": np.array(epsilons, dtype=float),
+        "hist_epsilons": np.array(list(winner_counts), dtype=float),
+        "winner_counts": np.array([np.asarray(c) for c in winner_counts.values()]),
+    }
+    for key in results[epsilons[0]]:
+        arrays[f"stat_{key}"] = np.array([results[eps][key] for eps in epsilons], dtype=float)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+# reads back what save_results wrote: (params, results, winner_counts)
+def load_results(path):
+    with np.load(path) as data:
+        params = json.loads(str(data["params"]))
+        epsilons = data["epsilons"].tolist()
+        stat_keys = [name[len("stat_"):] for name in data.files if name.startswith("stat_")]
+
+        results = {eps: {} for eps in epsilons}
+        for key in stat_keys:
+            for eps, value in zip(epsilons, data[f"stat_{key}"]):
+                if key.endswith("_ci"):
+                    results[eps][key] = tuple(value.tolist())
+                elif key == "runs":
+                    results[eps][key] = int(value)
+                else:
+                    results[eps][key] = float(value)
+
+        winner_counts = dict(zip(data["hist_epsilons"].tolist(), data["winner_counts"]))
+    return params, results, winner_counts
+
+# returns (results, winner_counts) for the report, simulating the worlds once
+# (shared by the sweep and the histograms, in memory-bounded chunks) only when
+# there is no persisted result for the same parameters and seed. without a seed nothing is cached,
+# since the run could not be reproduced
+def load_or_simulate(num_passengers, epsilons, hist_epsilons, runs_per_eps, seed=None,
+                     estimator="sample", results_dir=RESULTS_DIR):
+    params = {
+        "num_passengers": num_passengers,
+        "epsilons": list(epsilons),
+        "hist_epsilons": list(hist_epsilons),
+        "runs_per_eps": runs_per_eps,
+        "seed": seed,
+        "estimator": estimator,
+    }
+    path = results_path(params, results_dir)
+    if seed is not None and os.path.exists(path):
+        _, results, winner_counts = load_results(path)
+        return results, winner_counts
+
+    worlds = simulate_world_chunks(num_passengers=num_passengers, runs=runs_per_eps, seed=seed)
+    results, winner_counts = run_shared_sweep(worlds, epsilons, hist_epsilons, estimator=estimator)
+
+    if seed is not None:
+        save_results(path, params, results, winner_counts)
+    return results, winner_counts
@@ -1,67 +1,436 @@
+import random
+from dataclasses import dataclass
+from functools import partial
 from typing import Dict, List
-from players import TaxiService, generate_random_passengers
-from mechanisms import vcg_winner, exponential_dp_winner
+import numpy as np
+from players import (
+    TaxiService,
+    PassengerBatch,
+    generate_random_passengers,
+    generate_passenger_batch,
+    generate_passenger_arrays,
+    VALUE_RANGE,
+    LOCATION_RANGE,
+)
+from mechanisms import vcg_auction, vcg_auction_batch, ExponentialSampler, exponential_dp_winners, exponential_dp_probs
+from stats import SweepStats, WinnerCounts
+
+# max number of (world, passenger) cells the vectorized engine holds in memory at once
+BATCH_ELEMENTS = 1 << 20
+
+# worlds per (epsilon, run-chunk) shard. fixed, so the shards and their seeds
+# (and therefore the results) do not depend on how many workers run them
+SHARD_RUNS = 100_000
+
+# how each world contributes to the accuracy / DP welfare estimates:
+# "sample" uses one sampled DP winner, "expected" uses the exact conditional
+# accuracy and welfare given by the softmax probabilities (Rao-Blackwellized)
+ESTIMATORS = ("sample", "expected")
+
+# expected_metrics_by_quadrature: score cell width times epsilon (smaller = more
+# accurate, slower), and the number of midpoints used for the location uniform
+QUADRATURE_STEP = 0.1
+LOCATION_NODES = 4096
+# tau values expected_metrics_by_quadrature handles per numpy block
+QUADRATURE_BLOCK = 256
 
 # returns a dictionary with the results of a single world simulation
-def run_single_world(num_passengers, epsilon):
+# details=False leaves out the per-passenger scores and probs lists.
+# passengers can be given (list or PassengerBatch) instead of generated, and
+# columnar=True generates them as a PassengerBatch instead of dataclasses.
+# rng supplies the DP mechanism's uniform draw (the random module by default)
+def run_single_world(num_passengers, epsilon, details=True, passengers=None, columnar=False, rng=random):
     game = TaxiService(taxi_location=0.0)
-    passengers = generate_random_passengers(num_passengers)
+    if passengers is None:
+        passengers = generate_passenger_batch(num_passengers) if columnar else generate_random_passengers(num_passengers)
 
     # ground truth: who has highest welfare?
-    scores = [game.score(p) for p in passengers]
-    true_best_idx = max(range(len(passengers)), key=lambda i: scores[i])
+    scores = game.scores(passengers)
+    if isinstance(passengers, PassengerBatch):
+        true_best_idx = int(np.argmax(scores))
+    else:
+        true_best_idx = max(range(len(passengers)), key=lambda i: scores[i])
     true_best = passengers[true_best_idx]
-    true_best_score = scores[true_best_idx]
+    true_best_score = float(scores[true_best_idx])
 
     # DP mechanism
-    winner_dp, probs = exponential_dp_winner(game, passengers, epsilon)
-    winner_dp_score = game.score(winner_dp)
+    sampler = ExponentialSampler(scores, epsilon)
+    winner_dp_idx = sampler.sample(rng)
+    winner_dp = passengers[winner_dp_idx]
+    winner_dp_score = float(scores[winner_dp_idx])
 
-    # deterministic VCG allocation
-    winner_vcg = vcg_winner(game, passengers)
+    # deterministic VCG allocation and the winner's Clarke pivot payment
+    (winner_vcg,), (vcg_payment,) = vcg_auction(game, passengers)
     winner_vcg_score = game.score(winner_vcg)
+    collector_revenue = vcg_payment - game.distance_cost(winner_vcg)
 
-    return {
+    world = {
         "true_best_id": true_best.id,
         "winner_dp_id": winner_dp.id,
         "winner_vcg_id": winner_vcg.id,
-        "scores": scores,
-        "probs": probs,
         "true_best_score": true_best_score,
         "winner_dp_score": winner_dp_score,
         "winner_vcg_score": winner_vcg_score,
+        "vcg_payment": vcg_payment,
+        "owner_profit": winner_vcg.value - vcg_payment,
+        "collector_revenue": collector_revenue,
     }
+    if details:
+        world["scores"] = scores
+        world["probs"] = sampler.probs()
+    return world
+
+# batched version of run_single_world: simulates `runs` worlds at once and
+# returns a dictionary of arrays with one entry per world. with the "expected"
+# estimator no DP winner is sampled and the selection probabilities are returned
+def run_world_batch(num_passengers, epsilon, runs, rng, estimator="sample"):
+    game = TaxiService(taxi_location=0.0)
+    values, locations = generate_passenger_arrays(runs, num_passengers, rng)
+    scores = game.score_arrays(values, locations)
+    rows = np.arange(runs)
+
+    # ground truth: who has highest welfare in each world?
+    true_best_ids = np.argmax(scores, axis=1)
+
+    # deterministic VCG allocation and payments
+    vcg_ids, vcg_payments, vcg_thresholds = vcg_auction_batch(scores, game.distance_cost_arrays(locations))
+    winner_vcg_ids = vcg_ids[:, 0]
+    winner_vcg_scores = scores[rows, winner_vcg_ids]
+
+    worlds = {
+        "true_best_id": true_best_ids,
+        "winner_vcg_id": winner_vcg_ids,
+        "scores": scores,
+        "true_best_score": scores[rows, true_best_ids],
+        "winner_vcg_score": winner_vcg_scores,
+        "vcg_payment": vcg_payments[:, 0],
+        "owner_profit": winner_vcg_scores - vcg_thresholds,
+        "collector_revenue": vcg_thresholds,
+    }
+
+    # DP mechanism
+    if estimator == "expected":
+        worlds["dp_probs"] = exponential_dp_probs(scores, epsilon)
+    else:
+        winner_dp_ids = exponential_dp_winners(scores, epsilon, rng)
+        worlds["winner_dp_id"] = winner_dp_ids
+        worlds["winner_dp_score"] = scores[rows, winner_dp_ids]
+    return worlds
 
 # returns a dictionary mapping epsilon to statistics about accuracy & welfare
-def run_epsilon_sweep(num_passengers, epsilons, runs_per_eps):
+# vectorized=True runs the worlds through numpy in seeded batches instead of one
+# at a time, and workers=N additionally spreads those batches over N processes
+def run_epsilon_sweep(num_passengers, epsilons, runs_per_eps, vectorized=False, seed=None, workers=None,
+                      estimator="sample"):
+    _check_estimator(estimator)
+    if vectorized or workers:
+        return _run_epsilon_sweep_vectorized(num_passengers, epsilons, runs_per_eps, seed, workers, estimator)
+
     results = {}
     for eps in epsilons:
-        correct_count = 0
-        total_dp_welfare = 0.0
-        total_true_best_welfare = 0.0
-
+        stats = SweepStats()
         for _ in range(runs_per_eps):
-            world = run_single_world(num_passengers, eps)
-            if world["winner_dp_id"] == world["true_best_id"]:
-                correct_count += 1
-            total_dp_welfare += world["winner_dp_score"]
-            total_true_best_welfare += world["true_best_score"]
-
-        accuracy = correct_count / runs_per_eps
-        avg_dp_welfare = total_dp_welfare / runs_per_eps
-        avg_true_best_welfare = total_true_best_welfare / runs_per_eps
-
-        results[eps] = {
-            "accuracy": accuracy,
-            "avg_dp_welfare": avg_dp_welfare,
-            "avg_true_best_welfare": avg_true_best_welfare,
-        }
+            world = run_single_world(num_passengers, eps, details=estimator == "expected")
+            if estimator == "expected":
+                probs = world["probs"]
+                stats.update(probs[world["true_best_id"]],
+                             sum(p * s for p, s in zip(probs, world["scores"])),
+                             world["true_best_score"])
+            else:
+                stats.update(world["winner_dp_id"] == world["true_best_id"],
+                             world["winner_dp_score"],
+                             world["true_best_score"])
+            stats.update_vcg(world["vcg_payment"], world["owner_profit"], world["collector_revenue"])
+        results[eps] = stats.summary()
+    return results
+
+def _run_epsilon_sweep_vectorized(num_passengers, epsilons, runs_per_eps, seed, workers, estimator):
+    shards = _split_runs(epsilons, runs_per_eps)
+    shard_stats = _map_shards(partial(_sweep_shard, estimator=estimator), num_passengers, shards, seed, workers)
+
+    # merge the per-shard accumulators back into one entry per epsilon
+    merged = {eps: SweepStats() for eps in epsilons}
+    for (eps, _), stats in zip(shards, shard_stats):
+        merged[eps].merge(stats)
+    return {eps: stats.summary() for eps, stats in merged.items()}
+
+# adaptive version of the vectorized sweep: each epsilon is simulated in batches of
+# batch_runs worlds until the 95% confidence interval half widths on accuracy and
+# average DP welfare are under accuracy_tol / welfare_tol, or max_runs is reached.
+# "runs" in each result reports how many worlds were actually used
+def run_epsilon_sweep_adaptive(num_passengers, epsilons, accuracy_tol=0.005, welfare_tol=0.01,
+                               batch_runs=10_000, max_runs=10_000_000, seed=None, estimator="sample"):
+    _check_estimator(estimator)
+    seeds = np.random.SeedSequence(seed).spawn(len(epsilons))
+    batch_runs = max(1, min(batch_runs, BATCH_ELEMENTS // num_passengers))
+
+    results = {}
+    for eps, eps_seed in zip(epsilons, seeds):
+        rng = np.random.default_rng(eps_seed)
+        stats = SweepStats()
+        while stats.accuracy.count < max_runs:
+            runs = min(batch_runs, max_runs - stats.accuracy.count)
+            worlds = run_world_batch(num_passengers, eps, runs, rng, estimator)
+            _update_sweep_stats(stats, worlds)
+            if stats.converged(accuracy_tol, welfare_tol):
+                break
+        results[eps] = stats.summary()
     return results
 
 # helper: sample which DP winner gets chosen, for histograms
-def sample_dp_winners(num_passengers, epsilon, runs):
+# vectorized / workers behave as in run_epsilon_sweep and return a numpy array
+def sample_dp_winners(num_passengers, epsilon, runs, vectorized=False, seed=None, workers=None):
+    if vectorized or workers:
+        shards = _split_runs([epsilon], runs)
+        return np.concatenate(_map_shards(_winner_shard, num_passengers, shards, seed, workers))
+
     winner_ids = []
     for _ in range(runs):
-        world = run_single_world(num_passengers, epsilon)
+        world = run_single_world(num_passengers, epsilon, details=False)
         winner_ids.append(world["winner_dp_id"])
     return winner_ids
+
+# like sample_dp_winners, but keeps a fixed-size count per passenger id
+# instead of every winner, so memory does not grow with the number of runs
+def count_dp_winners(num_passengers, epsilon, runs, vectorized=False, seed=None, workers=None):
+    counts = WinnerCounts(num_passengers)
+    if vectorized or workers:
+        shards = _split_runs([epsilon], runs)
+        for shard_counts in _map_shards(_winner_count_shard, num_passengers, shards, seed, workers):
+            counts.merge(shard_counts)
+        return counts
+
+    for _ in range(runs):
+        world = run_single_world(num_passengers, epsilon, details=False)
+        counts.update(world["winner_dp_id"])
+    return counts
+
+# a batch of simulated worlds that is generated once and evaluated at every epsilon
+# (common random numbers): the score matrix, ground truth and the uniform draw used
+# by the DP mechanism in each world are all cached
+@dataclass
+class WorldBatch:
+    scores: np.ndarray
+    draws: np.ndarray
+    true_best_ids: np.ndarray
+    true_best_scores: np.ndarray
+    vcg_payments: np.ndarray
+    vcg_owner_profits: np.ndarray
+    vcg_collector_revenues: np.ndarray
+
+    # DP winner ids of every world at this epsilon
+    def dp_winners(self, epsilon):
+        return exponential_dp_winners(self.scores, epsilon, draws=self.draws)
+
+    # DP winner counts per passenger id at this epsilon
+    def dp_winner_counts(self, epsilon):
+        counts = WinnerCounts(self.scores.shape[1])
+        counts.update_batch(self.dp_winners(epsilon))
+        return counts
+
+# simulates `runs` worlds once so they can be shared by the sweep and the histograms
+def simulate_worlds(num_passengers, runs, seed=None):
+    rng = np.random.default_rng(seed)
+    game = TaxiService(taxi_location=0.0)
+    values, locations = generate_passenger_arrays(runs, num_passengers, rng)
+    scores = game.score_arrays(values, locations)
+    true_best_ids = np.argmax(scores, axis=1)
+    true_best_scores = scores[np.arange(runs), true_best_ids]
+    _, vcg_payments, vcg_thresholds = vcg_auction_batch(scores, game.distance_cost_arrays(locations))
+    return WorldBatch(
+        scores=scores,
+        draws=rng.random(runs),
+        true_best_ids=true_best_ids,
+        true_best_scores=true_best_scores,
+        vcg_payments=vcg_payments[:, 0],
+        vcg_owner_profits=true_best_scores - vcg_thresholds,
+        vcg_collector_revenues=vcg_thresholds,
+    )
+
+# simulates `runs` worlds in memory-bounded WorldBatch chunks (at most
+# BATCH_ELEMENTS // num_passengers worlds each), every chunk from its own
+# SeedSequence child of seed, so the worlds only depend on seed and runs
+def simulate_world_chunks(num_passengers, runs, seed=None):
+    chunk = max(1, BATCH_ELEMENTS // num_passengers)
+    starts = range(0, runs, chunk)
+    for start, chunk_seed in zip(starts, np.random.SeedSequence(seed).spawn(len(starts))):
+        yield simulate_worlds(num_passengers, min(chunk, runs - start), seed=chunk_seed)
+
+# evaluates every epsilon on the same worlds, a WorldBatch or an iterable of them
+# (e.g. simulate_world_chunks), one chunk at a time so memory does not grow with
+# the number of worlds. returns (results, winner_counts): the run_epsilon_sweep
+# output for epsilons and the DP winner counts per passenger id for hist_epsilons
+def run_shared_sweep(worlds, epsilons, hist_epsilons=(), estimator="sample"):
+    _check_estimator(estimator)
+    if isinstance(worlds, WorldBatch):
+        worlds = [worlds]
+
+    stats = {eps: SweepStats() for eps in epsilons}
+    counts = {}
+    for batch in worlds:
+        rows = np.arange(len(batch.scores))
+        for eps in epsilons:
+            if estimator == "expected":
+                probs = exponential_dp_probs(batch.scores, eps)
+                stats[eps].update_batch(probs[rows, batch.true_best_ids],
+                                        (probs * batch.scores).sum(axis=1),
+                                        batch.true_best_scores)
+            else:
+                winner_dp_ids = batch.dp_winners(eps)
+                stats[eps].update_batch(winner_dp_ids == batch.true_best_ids,
+                                        batch.scores[rows, winner_dp_ids],
+                                        batch.true_best_scores)
+            stats[eps].update_vcg_batch(batch.vcg_payments, batch.vcg_owner_profits, batch.vcg_collector_revenues)
+
+        for eps in hist_epsilons:
+            counts.setdefault(eps, WinnerCounts(batch.scores.shape[1])).merge(batch.dp_winner_counts(eps))
+
+    results = {eps: s.summary() for eps, s in stats.items()}
+    return results, {eps: c.counts for eps, c in counts.items()}
+
+# same output as run_epsilon_sweep, but every epsilon is evaluated on the same
+# worlds (a WorldBatch or an iterable of them, see run_shared_sweep)
+def run_epsilon_sweep_on_worlds(worlds, epsilons, estimator="sample"):
+    return run_shared_sweep(worlds, epsilons, estimator=estimator)[0]
+
+# expected accuracy and welfare for num_passengers passengers, integrating the
+# Rao-Blackwellized per-world quantities over the value / location distributions of
+# generate_random_passengers instead of sampling worlds. the softmax denominator is
+# removed with 1 / S = integral of exp(-t * S) dt, which makes the n passengers
+# independent for a fixed t, so only a (score, t) grid is summed and the cost does
+# not grow with num_passengers.
+#
+# discretization: scores are cut into cells of width min(score range / nodes,
+# QUADRATURE_STEP / epsilon), with exact probability masses. two passengers in the
+# same cell count as tied, which is off by at most about epsilon * width / 4 in
+# their softmax, so keeping epsilon * width small bounds the error at any epsilon
+# (about 1e-4 in accuracy for 3 passengers, epsilon = 0.1 .. 50). the work grows
+# like epsilon * score range / QUADRATURE_STEP
+def expected_metrics_by_quadrature(num_passengers, epsilon, nodes=1024, taxi_location=0.0):
+    if epsilon <= 0:
+        raise ValueError("epsilon must be positive")
+    points, weights = _score_distribution(nodes, epsilon, taxi_location)
+    below = np.cumsum(weights) - weights
+
+    # t = exp(-epsilon * tau). with x = epsilon * (s - tau), a cell only matters for
+    # x in [-35, 4]: below that its kernel is under 1e-15, above it exp(-t * exp(epsilon * s))
+    # is. so each block of tau only looks at the cells in that window, the ones below
+    # it entering with their whole mass (below) and the ones above not at all
+    step = QUADRATURE_STEP / epsilon
+    taus = np.arange(points[0] - 4.0 / epsilon, points[-1] + 35.0 / epsilon + step, step)
+    cell_width = points[1] - points[0]
+
+    accuracy = dp_welfare = 0.0
+    for start in range(0, len(taus), QUADRATURE_BLOCK):
+        tau = taus[start:start + QUADRATURE_BLOCK, None]
+        first = max(0, int(np.floor((tau[0, 0] - 35.0 / epsilon - points[0]) / cell_width)))
+        last = min(len(points), int(np.ceil((tau[-1, 0] + 4.0 / epsilon - points[0]) / cell_width)) + 1)
+        cells, mass = points[first:last], weights[first:last]
+
+        x = epsilon * (cells[None, :] - tau)
+        # exp(-t * exp(epsilon * s)) for every (tau, cell), and its integral over
+        # the scores below each cell (half of the cell itself, for ties)
+        survive = np.exp(-np.exp(np.minimum(x, 50.0)))
+        weighted = mass * survive
+        below_cell = below[first] + np.cumsum(weighted, axis=1) - weighted / 2.0
+        kernel = epsilon * step * np.exp(x - np.exp(np.minimum(x, 50.0)))
+
+        accuracy += float((mass * kernel * below_cell ** (num_passengers - 1)).sum())
+        everyone = (below[first] + weighted.sum(axis=1, keepdims=True)) ** (num_passengers - 1)
+        dp_welfare += float((mass * cells * kernel * everyone).sum())
+
+    # true best welfare: E[max score] from the cdf of the max, F ** n
+    cdf = np.append(below, 1.0)
+    true_best_welfare = float(points @ np.diff(cdf ** num_passengers))
+    return {
+        "accuracy": num_passengers * accuracy,
+        "avg_dp_welfare": num_passengers * dp_welfare,
+        "avg_true_best_welfare": true_best_welfare,
+    }
+
+# distribution of one passenger's score (value - distance cost) on cells of width
+# at most QUADRATURE_STEP / epsilon: returns the cell midpoints and exact masses.
+# the value uniform is integrated in closed form and the location uniform with the
+# midpoint rule on LOCATION_NODES points
+def _score_distribution(nodes, epsilon, taxi_location):
+    locations = LOCATION_RANGE[0] + (LOCATION_RANGE[1] - LOCATION_RANGE[0]) * (
+        np.arange(LOCATION_NODES) + 0.5) / LOCATION_NODES
+    costs = np.abs(locations - taxi_location)
+    low, high = VALUE_RANGE[0] - costs.max(), VALUE_RANGE[1] - costs.min()
+
+    cells = max(nodes, int(np.ceil((high - low) * epsilon / QUADRATURE_STEP)))
+    edges = np.linspace(low, high, cells + 1)
+    cdf = np.empty(cells + 1)
+    chunk = max(1, BATCH_ELEMENTS // LOCATION_NODES)
+    for start in range(0, cells + 1, chunk):
+        values = edges[start:start + chunk, None] + costs[None, :]
+        cdf[start:start + chunk] = np.clip((values - VALUE_RANGE[0]) / (VALUE_RANGE[1] - VALUE_RANGE[0]),
+                                           0.0, 1.0).mean(axis=1)
+    return (edges[:-1] + edges[1:]) / 2.0, np.diff(cdf)
+
+# splits every epsilon's runs into (epsilon, runs) shards of at most SHARD_RUNS worlds
+def _split_runs(epsilons, runs_per_eps):
+    return [
+        (eps, min(SHARD_RUNS, runs_per_eps - start))
+        for eps in epsilons
+        for start in range(0, runs_per_eps, SHARD_RUNS)
+    ]
+
+# runs fn over every shard with its own independent RNG stream spawned from seed,
+# either in this process or across a pool of `workers` processes (results keep shard order)
+def _map_shards(fn, num_passengers, shards, seed, workers):
+    seeds = np.random.SeedSequence(seed).spawn(len(shards))
+    args = [(num_passengers, eps, runs, shard_seed) for (eps, runs), shard_seed in zip(shards, seeds)]
+    if not workers or workers <= 1:
+        return [fn(*a) for a in args]
+
+    # imported here so single-process runs don't pay for it at startup
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, *zip(*args)))
+
+# yields run_world_batch results for one shard, in memory-bounded batches
+def _shard_batches(num_passengers, epsilon, runs, seed_seq, estimator="sample"):
+    rng = np.random.default_rng(seed_seq)
+    batch_size = max(1, BATCH_ELEMENTS // num_passengers)
+    for start in range(0, runs, batch_size):
+        yield run_world_batch(num_passengers, epsilon, min(batch_size, runs - start), rng, estimator)
+
+# accuracy / welfare accumulators for one shard
+def _sweep_shard(num_passengers, epsilon, runs, seed_seq, estimator="sample"):
+    stats = SweepStats()
+    for worlds in _shard_batches(num_passengers, epsilon, runs, seed_seq, estimator):
+        _update_sweep_stats(stats, worlds)
+    return stats
+
+# folds one run_world_batch result into the sweep accumulators, using the
+# selection probabilities when the batch was run with the "expected" estimator
+def _update_sweep_stats(stats, worlds):
+    stats.update_vcg_batch(worlds["vcg_payment"], worlds["owner_profit"], worlds["collector_revenue"])
+    if "dp_probs" in worlds:
+        probs = worlds["dp_probs"]
+        rows = np.arange(len(probs))
+        stats.update_batch(probs[rows, worlds["true_best_id"]],
+                           (probs * worlds["scores"]).sum(axis=1),
+                           worlds["true_best_score"])
+    else:
+        stats.update_batch(worlds["winner_dp_id"] == worlds["true_best_id"],
+                           worlds["winner_dp_score"],
+                           worlds["true_best_score"])
+
+def _check_estimator(estimator):
+    if estimator not in ESTIMATORS:
+        raise ValueError(f"Unknown estimator '{estimator}'")
+
+# DP winner ids for one shard
+def _winner_shard(num_passengers, epsilon, runs, seed_seq):
+    return np.concatenate([
+        worlds["winner_dp_id"] for worlds in _shard_batches(num_passengers, epsilon, runs, seed_seq)
+    ])
+
+# DP winner counts for one shard
+def _winner_count_shard(num_passengers, epsilon, runs, seed_seq):
+    counts = WinnerCounts(num_passengers)
+    for worlds in _shard_batches(num_passengers, epsilon, runs, seed_seq):
+        counts.update_batch(worlds["winner_dp_id"])
+    return counts
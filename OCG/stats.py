@@ -0,0 +1,145 @@
+import math
+import numpy as np
+
+# z value for a two-sided 95% normal confidence interval
+Z_95 = 1.959963984540054
+
+# streaming mean / variance (Welford). values can be fed one at a time with
+# update() or as numpy arrays with update_batch(), memory stays constant either way
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    # folds in a whole array at once using the pairwise (Chan et al.) merge
+    def update_batch(self, xs):
+        xs = np.asarray(xs, dtype=float)
+        if xs.size == 0:
+            return
+        batch = RunningStats()
+        batch.count = xs.size
+        batch.mean = float(xs.mean())
+        batch._m2 = float(((xs - batch.mean) ** 2).sum())
+        self.merge(batch)
+
+    # combines another accumulator into this one (used to merge parallel shards)
+    def merge(self, other):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self.count = total
+
+    # sample variance
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    # standard error of the mean
+    @property
+    def stderr(self):
+        return math.sqrt(self.variance / self.count) if self.count > 0 else math.inf
+
+    # half width of the normal confidence interval on the mean
+    def half_width(self, z=Z_95):
+        return z * self.stderr
+
+    # (low, high) confidence interval on the mean
+    def ci(self, z=Z_95):
+        h = self.half_width(z)
+        return self.mean - h, self.mean + h
+
+# fixed-size histogram of DP winner ids, one bin per passenger
+class WinnerCounts:
+    def __init__(self, num_passengers):
+        self.counts = np.zeros(num_passengers, dtype=np.int64)
+
+    def update(self, winner_id):
+        self.counts[winner_id] += 1
+
+    def update_batch(self, winner_ids):
+        self.counts += np.bincount(winner_ids, minlength=len(self.counts))
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+# accuracy and welfare accumulators for one epsilon of a sweep
+class SweepStats:
+    def __init__(self):
+        self.accuracy = RunningStats()
+        self.dp_welfare = RunningStats()
+        self.true_best_welfare = RunningStats()
+
+        # VCG payment statistics, only reported if they were fed in
+        self.vcg_payment = RunningStats()
+        self.owner_profit = RunningStats()
+        self.collector_revenue = RunningStats()
+
+    def update(self, correct, dp_score, true_best_score):
+        self.accuracy.update(float(correct))
+        self.dp_welfare.update(dp_score)
+        self.true_best_welfare.update(true_best_score)
+
+    def update_vcg(self, payment, owner_profit, collector_revenue):
+        self.vcg_payment.update(payment)
+        self.owner_profit.update(owner_profit)
+        self.collector_revenue.update(collector_revenue)
+
+    def update_batch(self, correct, dp_scores, true_best_scores):
+        self.accuracy.update_batch(correct)
+        self.dp_welfare.update_batch(dp_scores)
+        self.true_best_welfare.update_batch(true_best_scores)
+
+    def update_vcg_batch(self, payments, owner_profits, collector_revenues):
+        self.vcg_payment.update_batch(payments)
+        self.owner_profit.update_batch(owner_profits)
+        self.collector_revenue.update_batch(collector_revenues)
+
+    def merge(self, other):
+        self.accuracy.merge(other.accuracy)
+        self.dp_welfare.merge(other.dp_welfare)
+        self.true_best_welfare.merge(other.true_best_welfare)
+        self.vcg_payment.merge(other.vcg_payment)
+        self.owner_profit.merge(other.owner_profit)
+        self.collector_revenue.merge(other.collector_revenue)
+
+    # True once the confidence intervals on accuracy and average DP welfare
+    # are narrower (half width) than the given targets
+    def converged(self, accuracy_tol, welfare_tol):
+        return (self.accuracy.half_width() <= accuracy_tol
+                and self.dp_welfare.half_width() <= welfare_tol)
+
+    # the per-epsilon results dict used by the sweeps and plots, with 95% error bars
+    def summary(self):
+        summary = {
+            "accuracy": self.accuracy.mean,
+            "avg_dp_welfare": self.dp_welfare.mean,
+            "avg_true_best_welfare": self.true_best_welfare.mean,
+            "accuracy_ci": self.accuracy.ci(),
+            "avg_dp_welfare_ci": self.dp_welfare.ci(),
+            "avg_true_best_welfare_ci": self.true_best_welfare.ci(),
+            "runs": self.accuracy.count,
+        }
+        if self.vcg_payment.count > 0:
+            summary.update({
+                "avg_vcg_payment": self.vcg_payment.mean,
+                "avg_owner_profit": self.owner_profit.mean,
+                "avg_collector_revenue": self.collector_revenue.mean,
+                "avg_vcg_payment_ci": self.vcg_payment.ci(),
+                "avg_owner_profit_ci": self.owner_profit.ci(),
+                "avg_collector_revenue_ci": self.collector_revenue.ci(),
+            })
+        return summary
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from players import TaxiService, Passenger, PassengerBatch, generate_passenger_arrays
+from mechanisms import ExponentialSampler, exponential_dp_winners
+from simulate import run_single_world, run_world_batch
+
+EPSILONS = [0.01, 0.1, 1.0, 5.0, 50.0]
+
+# stands in for the random module / an rng so the scalar sampler uses a given uniform
+class FixedDraw:
+    def __init__(self, value):
+        self.value = value
+
+    def random(self):
+        return self.value
+
+# the batched mechanism and the scalar ExponentialSampler (list and numpy scores)
+# must pick the same winner in every world when given the same uniform draws
+@pytest.mark.parametrize("epsilon", EPSILONS)
+def test_exponential_dp_winners_matches_scalar_sampler(epsilon):
+    rng = np.random.default_rng(1234)
+    values, locations = generate_passenger_arrays(2000, 7, rng)
+    scores = TaxiService(taxi_location=0.0).score_arrays(values, locations)
+    draws = rng.random(len(scores))
+
+    winners = exponential_dp_winners(scores, epsilon, draws=draws)
+    for row, draw, winner in zip(scores, draws, winners):
+        assert ExponentialSampler(row.tolist(), epsilon).sample(FixedDraw(draw)) == winner
+        assert ExponentialSampler(row, epsilon).sample(FixedDraw(draw)) == winner
+
+# run_world_batch against run_single_world on the same seeded worlds, with the
+# passengers as dataclasses and as a PassengerBatch: the same ground truth, VCG
+# outcome and DP winner when run_single_world gets the batch's DP draw
+@pytest.mark.parametrize("columnar", [False, True])
+@pytest.mark.parametrize("epsilon", EPSILONS)
+def test_run_world_batch_matches_run_single_world(epsilon, columnar):
+    runs, num_passengers = 500, 5
+    batch = run_world_batch(num_passengers, epsilon, runs, np.random.default_rng(99))
+
+    # replay the batch's random stream: values, locations, then one DP draw per world
+    rng = np.random.default_rng(99)
+    values, locations = generate_passenger_arrays(runs, num_passengers, rng)
+    draws = rng.random(runs)
+    for i in range(runs):
+        if columnar:
+            passengers = PassengerBatch(np.arange(num_passengers), values[i], locations[i])
+        else:
+            passengers = [Passenger(j, float(values[i, j]), float(locations[i, j])) for j in range(num_passengers)]
+        world = run_single_world(num_passengers, epsilon, passengers=passengers, rng=FixedDraw(draws[i]))
+
+        assert world["true_best_id"] == batch["true_best_id"][i]
+        assert world["winner_vcg_id"] == batch["winner_vcg_id"][i]
+        assert world["winner_dp_id"] == batch["winner_dp_id"][i]
+        assert world["true_best_score"] == pytest.approx(batch["true_best_score"][i])
+        assert world["winner_dp_score"] == pytest.approx(batch["winner_dp_score"][i])
+        assert world["vcg_payment"] == pytest.approx(batch["vcg_payment"][i])
+        assert world["owner_profit"] == pytest.approx(batch["owner_profit"][i])
+        assert world["collector_revenue"] == pytest.approx(batch["collector_revenue"][i])